@@ -1,2 +1,3 @@
 #-*-coding:utf-8-*-
-from mnsim_noc.Array.base_array import BaseArray
\ No newline at end of file
+from mnsim_noc.Array.base_array import BaseArray
+from mnsim_noc.Array.event_array import EventDrivenArray
\ No newline at end of file
@@ -7,6 +7,10 @@
 @CreateTime:
     2021/10/08 18:21
 """
+import gzip
+import os
+import pickle
+import time
 import numpy as np
 from mnsim_noc.utils.component import Component
 from mnsim_noc.Strategy.mapping import Mapping
@@ -20,7 +24,9 @@ class BaseArray(Component):
     NAME = "behavior_driven"
     def __init__(self, task_behavior_list, image_num,
         tile_net_shape, buffer_size, band_width,
-        mapping_strategy="naive", schedule_strategy="naive", transparent_flag=False
+        mapping_strategy="naive", schedule_strategy="naive", transparent_flag=False,
+        mapping_config=None, statistics_flag=False, packet_config=None, wire_config=None,
+        multicast_flag=False
     ):
         super(BaseArray, self).__init__()
         # logging
@@ -39,11 +45,29 @@ class BaseArray(Component):
         self._get_behavior_number(task_behavior_list)
         # init
         self.mapping_strategy = Mapping.get_class_(mapping_strategy)(
-            task_behavior_list, image_num, tile_net_shape, buffer_size, band_width
+            task_behavior_list, image_num, tile_net_shape, buffer_size, band_width,
+            mapping_config
         )
-        self.tile_list, self.communication_list, self.wire_net = self.mapping_strategy.mapping_net()
+        self.mapping_strategy.set_array_config({
+            "engine": self.NAME,
+            "schedule_strategy": schedule_strategy,
+            "transparent_flag": transparent_flag,
+            "packet_config": packet_config,
+            "wire_config": wire_config,
+            "multicast_flag": multicast_flag,
+        })
+        self.tile_list, self.communication_list, self.wire_net = \
+            self.mapping_strategy.mapping_net(multicast_flag)
         # set transparent
         self.wire_net.set_transparent_flag(transparent_flag)
+        # set wire config, link model and band width of the wires
+        if wire_config is not None:
+            self.set_wire_config(wire_config)
+        # set packet mode, for the wormhole schedule
+        if packet_config is not None:
+            self.wire_net.set_packet_mode(**packet_config)
+        # set statistics, no range list
+        self.set_statistics_flag(statistics_flag)
         self.schedule_strategy = Schedule.get_class_(schedule_strategy)(
             self.communication_list, self.wire_net
         )
@@ -51,6 +75,41 @@ class BaseArray(Component):
         self.image_num = image_num
         self.tile_net_shape = tile_net_shape
         self.time_point_list = []
+        # state of the run loop, None for not running, kept here for the checkpoint
+        self.run_state = None
+        self.trace_sink = None
+        self.checkpoint_path = None
+        self.checkpoint_interval = None
+        self.checkpoint_time = None
+
+    @classmethod
+    def from_config(cls, task_behavior_list, array_config):
+        """
+        create the array from the config dict, the keys are the same as the config file
+        the engine key chooses the array class
+        """
+        array_class = BaseArray.get_class_(array_config.get("engine", "behavior_driven"))
+        return array_class(
+            task_behavior_list,
+            array_config.get("image_num", 1),
+            (
+                array_config.get("tile_array_row", 16),
+                array_config.get("tile_array_col", 16)
+            ),
+            (
+                array_config.get("input_buffer_size", 822400),
+                array_config.get("output_buffer_size", 822400)
+            ), # default 32768 bits, 4KB
+            array_config.get("band_width", 1), # default, 1Gbps
+            array_config.get("mapping_strategy", "naive"),
+            array_config.get("schedule_strategy", "naive"),
+            array_config.get("transparent_flag", False),
+            array_config.get("mapping_config", None),
+            array_config.get("statistics_flag", False),
+            array_config.get("packet_config", None),
+            array_config.get("wire_config", None),
+            array_config.get("multicast_flag", False),
+        )
 
     def _get_behavior_number(self, task_behavior_list):
         """
@@ -86,15 +145,106 @@ class BaseArray(Component):
                 f" {behavior_number[i]} behaviors"
             )
 
-    def run(self):
+    def set_wire_config(self, wire_config):
         """
-        run the array
+        set the wire config, keys: link_model, router_delay and band_width_list
+        band_width_list is the list of (wire_position, band_width) for the heterogeneous wires
         """
-        current_time = 0.
-        update_module = self.mapping_strategy.get_update_order(
-            self.tile_list, self.communication_list
+        band_width_list = wire_config.get("band_width_list", [])
+        if len(band_width_list) > 0:
+            self.wire_net.set_band_width(
+                [wire_position for wire_position, _ in band_width_list],
+                [band_width for _, band_width in band_width_list]
+            )
+        self.wire_net.set_link_model(
+            wire_config.get("link_model", "summed"), wire_config.get("router_delay", 0.)
         )
+
+    def set_statistics_flag(self, statistics_flag):
+        """
+        set the statistics flag, the tiles and communications only keep the running statistics
+        and the array only keeps the last time point
+        """
+        self.statistics_flag = statistics_flag
+        for module in self.tile_list + self.communication_list:
+            module.set_statistics_flag(statistics_flag)
+
+    def set_trace_sink(self, trace_sink):
+        """
+        set the trace sink for the tile, communication and wire events, None for no trace
+        """
+        self.trace_sink = trace_sink
+        for module in self.tile_list + self.communication_list:
+            module.set_trace_sink(trace_sink)
+
+    def set_checkpoint(self, checkpoint_path, checkpoint_interval=600.):
+        """
+        save the checkpoint to the path every checkpoint_interval seconds in the run
+        """
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_time = time.time()
+
+    def save_checkpoint(self, checkpoint_path=None):
+        """
+        save the whole array with the run state, gzip pickle
+        written to a temporary file and renamed, so the old checkpoint is kept on failure
+        """
+        checkpoint_path = self.checkpoint_path if checkpoint_path is None else checkpoint_path
+        temp_path = checkpoint_path + ".tmp"
+        with gzip.open(temp_path, "wb", compresslevel=1) as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, checkpoint_path)
+        self.logger.info(f"Save the checkpoint at {self.time_point_list[-1:]} to {checkpoint_path}")
+
+    @staticmethod
+    def load_checkpoint(checkpoint_path):
+        """
+        load the array from the checkpoint, the run continues from the saved time
+        """
+        with gzip.open(checkpoint_path, "rb") as f:
+            array = pickle.load(f)
+        array.checkpoint_time = time.time()
+        return array
+
+    def _check_checkpoint(self):
+        """
+        save the checkpoint if the interval is reached
+        """
+        if self.checkpoint_path is not None and \
+            time.time() - self.checkpoint_time >= self.checkpoint_interval:
+            self.save_checkpoint()
+            self.checkpoint_time = time.time()
+
+    def _init_run_state(self):
+        """
+        init the state of the run loop
+        """
         self.time_point_list = []
+        self.run_state = {
+            "current_time": 0.,
+            "update_module": self.mapping_strategy.get_update_order(
+                self.tile_list, self.communication_list
+            ),
+        }
+
+    def _add_time_point(self, current_time):
+        """
+        add the time point of the run, only the last one in the statistics mode
+        """
+        if self.statistics_flag:
+            self.time_point_list[-1:] = [current_time]
+        else:
+            self.time_point_list.append(current_time)
+
+    def run(self):
+        """
+        run the array, continue from the run state if it is restored from the checkpoint
+        """
+        if self.run_state is None:
+            self._init_run_state()
+        current_time = self.run_state["current_time"]
+        update_module = self.run_state["update_module"]
         while True:
             # running the data
             for module in update_module:
@@ -114,7 +264,10 @@ class BaseArray(Component):
             current_time = next_time
             if current_time == float("inf"):
                 break
-            self.time_point_list.append(current_time)
+            self._add_time_point(current_time)
+            self.run_state["current_time"] = current_time
+            self._check_checkpoint()
+        self.run_state = None
         # check if the simulation is over
         self.check_finish()
 
@@ -131,9 +284,9 @@ class BaseArray(Component):
         # check if the wire net is finished
         self.wire_net.check_finish()
 
-    def show_latency_throughput(self):
+    def get_complete_time(self):
         """
-        show the latency and throughput
+        get the complete time range on each task and each image
         """
         # show the computation andcommunication range on each task and each image
         complete_time = {} # each task, and list for each image
@@ -142,29 +295,56 @@ class BaseArray(Component):
             if task_id not in complete_time:
                 complete_time[task_id] = \
                     [[float("inf"), float("-inf")] for _ in range(self.image_num)]
-            computation_range = tile.get_computation_range()
-            assert len(computation_range) == self.image_num
+            image_range = tile.get_image_range()
+            assert len(image_range) == self.image_num
             for i in range(self.image_num):
                 complete_time[task_id][i][0] = min([
-                    complete_time[task_id][i][0], computation_range[i][0][0]
+                    complete_time[task_id][i][0], image_range[i][0]
                 ])
                 complete_time[task_id][i][1] = max([
-                    complete_time[task_id][i][1], computation_range[i][-1][1]
+                    complete_time[task_id][i][1], image_range[i][1]
                 ])
-        # logger complete time
+        return complete_time
+
+    def get_latency_throughput(self, complete_time=None):
+        """
+        get the average latency, average throughput and total cost time on each task
+        throughput is None for only one image
+        """
+        if complete_time is None:
+            complete_time = self.get_complete_time()
+        latency_throughput = {}
         for task_id, computation_range in complete_time.items():
             al = sum([x[1]-x[0] for x in computation_range])/self.image_num
-            output_str = f"Task {task_id} average latency is {al/1e6:.3f} ms"
+            at = None
             if self.image_num > 1:
                 at = sum([
                     computation_range[i+1][1]-computation_range[i][1]
                     for i in range(self.image_num-1)
                 ])/(self.image_num-1)
-                output_str += f", average throughput is {at/1e6:.3f} ms"
+            latency_throughput[task_id] = {
+                "latency": al,
+                "throughput": at,
+                "total_time": computation_range[-1][1]-computation_range[0][0],
+            }
+        return latency_throughput
+
+    def show_latency_throughput(self):
+        """
+        show the latency and throughput
+        """
+        complete_time = self.get_complete_time()
+        latency_throughput = self.get_latency_throughput(complete_time)
+        # logger complete time
+        for task_id, computation_range in complete_time.items():
+            result = latency_throughput[task_id]
+            output_str = f"Task {task_id} average latency is {result['latency']/1e6:.3f} ms"
+            if result["throughput"] is not None:
+                output_str += f", average throughput is {result['throughput']/1e6:.3f} ms"
             else:
                 output_str += ", no throughput time"
             output_str += f", total cost time is " + \
-                f"{(computation_range[-1][1]-computation_range[0][0])/1e6:.3f} ms"
+                f"{result['total_time']/1e6:.3f} ms"
             self.logger.info(output_str)
             for i, sl in enumerate(computation_range):
                 self.logger.info(
@@ -178,7 +358,7 @@ class BaseArray(Component):
         """
         # show the tile and wire running rate
         end_time = self.time_point_list[-1]
-        tile_task_id = np.zeros(self.tile_net_shape, dtype=np.int)
+        tile_task_id = np.zeros(self.tile_net_shape, dtype=np.int64)
         tile_load_rate = np.zeros(self.tile_net_shape)
         for tile in self.tile_list:
             position = tile.position
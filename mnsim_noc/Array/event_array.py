@@ -0,0 +1,101 @@
+#-*-coding:utf-8-*-
+"""
+@FileName:
+    event_array.py
+@Description:
+    Event driven Array class, update only the modules with events
+@CreateTime:
+    2026/10/16 22:30
+"""
+import heapq
+from mnsim_noc.utils.wake_up import DirtyQueue
+from mnsim_noc.Array.base_array import BaseArray
+
+class EventDrivenArray(BaseArray):
+    """
+    event driven array for behavior driven simulation
+    the end time of running tiles and communications are kept in a heap,
+    only the modules whose events fire, or woken up by the buffers, are updated
+    and only the dirty communications are checked in the schedule
+    the simulation result is the same as the base array
+    """
+    NAME = "event_driven"
+
+    def _init_run_state(self):
+        """
+        init the state of the run loop, the modules, the wake up and the event queue
+        """
+        super(EventDrivenArray, self)._init_run_state()
+        update_module = self.run_state["update_module"]
+        communication_ids = set(id(communication) for communication in self.communication_list)
+        end_time_func = [
+            module.get_communication_end_time if id(module) in communication_ids \
+                else module.get_computation_end_time
+            for module in update_module
+        ]
+        # dirty module in the update order, and module with running state changed
+        dirty_module = DirtyQueue(range(len(update_module)))
+        state_module = set()
+        for i, module in enumerate(update_module):
+            module.state_wake_up.add(state_module, i)
+            if id(module) not in communication_ids:
+                # the tile get new data, or the output buffer is released
+                module.input_buffer.data_wake_up.add(dirty_module, i)
+                module.output_buffer.space_wake_up.add(dirty_module, i)
+        self.schedule_strategy.set_dirty_communication()
+        # event queue, (end_time, module index), lazy invalidation
+        self.run_state.update({
+            "end_time_func": end_time_func,
+            "dirty_module": dirty_module,
+            "state_module": state_module,
+            "event_queue": [],
+        })
+
+    def run(self):
+        """
+        run the array, continue from the run state if it is restored from the checkpoint
+        """
+        if self.run_state is None:
+            self._init_run_state()
+        current_time = self.run_state["current_time"]
+        update_module = self.run_state["update_module"]
+        end_time_func = self.run_state["end_time_func"]
+        dirty_module = self.run_state["dirty_module"]
+        state_module = self.run_state["state_module"]
+        event_queue = self.run_state["event_queue"]
+        while True:
+            # running the data, in the update order
+            while len(dirty_module) > 0:
+                update_module[dirty_module.pop()].update(current_time)
+            # schedule for the path
+            self.schedule_strategy.schedule(current_time)
+            # push the events of the started modules
+            for index in state_module:
+                end_time = end_time_func[index]()
+                if end_time != float("inf"):
+                    heapq.heappush(event_queue, (end_time, index))
+            state_module.clear()
+            # get next time, ignore the invalid events
+            next_time = float("inf")
+            while event_queue:
+                end_time, index = event_queue[0]
+                if end_time_func[index]() != end_time:
+                    heapq.heappop(event_queue)
+                    continue
+                if next_time == float("inf"):
+                    next_time = end_time
+                if end_time != next_time:
+                    break
+                heapq.heappop(event_queue)
+                dirty_module.add(index)
+            # check if the simulation is over
+            assert next_time > current_time
+            current_time = next_time
+            if current_time == float("inf"):
+                break
+            self._add_time_point(current_time)
+            self.run_state["current_time"] = current_time
+            self._check_checkpoint()
+        self.run_state = None
+        # check if the simulation is over
+        self.check_finish()
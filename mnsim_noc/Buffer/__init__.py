@@ -1,4 +1,4 @@
 #-*-coding:utf-8-*-
-from mnsim_noc.Buffer.base_buffer import BaseBuffer
+from mnsim_noc.Buffer.base_buffer import BaseBuffer, DataBlock, get_data_block
 from mnsim_noc.Buffer.multi_input_buffer import MultiInputBuffer
 from mnsim_noc.Buffer.multi_output_buffer import MultiOutputBuffer
\ No newline at end of file
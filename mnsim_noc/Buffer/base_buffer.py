@@ -9,21 +9,134 @@
 @CreateTime:
     2022/05/07 09:27
 """
+import collections
+import weakref
 from mnsim_noc.utils.component import Component
 
+# interned data block pool, key -> DataBlock
+DATA_BLOCK_POOL = weakref.WeakValueDictionary()
+
+class DataBlock(object):
+    """
+    data block, interned tuple with precomputed size and hash
+    (x, y, start, end, bit, total, image_id, layer_id, in_id, tile_id)
+    """
+    __slots__ = ["key", "size", "hash", "__weakref__"]
+    def __init__(self, key):
+        self.key = key
+        self.size = (key[3] - key[2]) * key[4]
+        self.hash = hash(key)
+
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, DataBlock):
+            return self.hash == other.hash and self.key == other.key
+        if isinstance(other, (list, tuple)):
+            return self.key == tuple(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __getitem__(self, index):
+        return self.key[index]
+
+    def __len__(self):
+        return len(self.key)
+
+    def __iter__(self):
+        return iter(self.key)
+
+    def __repr__(self):
+        return "DataBlock" + repr(self.key)
+
+    def __reduce__(self):
+        return (get_data_block, (self.key,))
+
+def get_data_block(data):
+    """
+    get the interned data block of the data
+    data can be list, tuple or DataBlock
+    """
+    if isinstance(data, DataBlock):
+        return data
+    key = tuple(data)
+    data_block = DATA_BLOCK_POOL.get(key)
+    if data_block is None:
+        data_block = DataBlock(key)
+        DATA_BLOCK_POOL[key] = data_block
+    return data_block
+
 def get_data_size(data):
     """
     get the size of the data
     (x, y, start, end, bit, total, image_id, layer_id, in_id, tile_id)
     """
+    if isinstance(data, DataBlock):
+        return data.size
     return (data[3] - data[2]) * data[4]
 
 def get_data_tile(data):
     """
     check if the data is from the tile
     """
+    if isinstance(data, DataBlock):
+        return data.key[9]
     return data[9]
 
+class DataOrder(object):
+    """
+    FIFO order of the data, the deleted data are removed lazily
+    the first same data in the order is deleted, lazily if it is not the head,
+    so the head is always alive
+    """
+    __slots__ = ["order", "delete_count"]
+    def __init__(self):
+        self.order = collections.deque()
+        self.delete_count = dict()
+
+    def __len__(self):
+        return len(self.order)
+
+    def append(self, data):
+        """
+        append the data at the tail
+        """
+        self.order.append(data)
+
+    def get_head(self):
+        """
+        get the head data, None for the empty order
+        """
+        if len(self.order) == 0:
+            return None
+        return self.order[0]
+
+    def delete(self, data):
+        """
+        delete the data, and pop the deleted data at the head
+        """
+        if self.order[0] is not data:
+            self.delete_count[data] = self.delete_count.get(data, 0) + 1
+            return None
+        self.order.popleft()
+        while len(self.order) > 0:
+            head = self.order[0]
+            count = self.delete_count.get(head, 0)
+            if count == 0:
+                break
+            self.order.popleft()
+            if count == 1:
+                del self.delete_count[head]
+            else:
+                self.delete_count[head] = count - 1
+        return None
+
 class BaseBuffer(Component):
     """
     Base Buffer class for behavior-driven simulation
@@ -36,7 +149,8 @@ class BaseBuffer(Component):
         """
         super(BaseBuffer, self).__init__()
         self.buffer_size = buffer_size
-        self.buffer_data = []
+        # data -> count, in the order of insertion
+        self.buffer_data = dict()
         self.used_space = 0
 
     def _add_one(self, data):
@@ -44,8 +158,10 @@ class BaseBuffer(Component):
         add one data to the buffer
         """
         # perhaps add a check to make sure data is not in the buffer
-        self.buffer_data.append(data)
-        self.used_space += get_data_size(data)
+        data = get_data_block(data)
+        self.buffer_data[data] = self.buffer_data.get(data, 0) + 1
+        self.used_space += data.size
+        return data
 
     def add_data_list(self, data_list):
         """
@@ -59,8 +175,14 @@ class BaseBuffer(Component):
         delete one data in the buffer
         """
         # perhaps add a check to make sure data is in the buffer
-        self.buffer_data.remove(data)
-        self.used_space -= get_data_size(data)
+        data = get_data_block(data)
+        count = self.buffer_data[data]
+        if count == 1:
+            del self.buffer_data[data]
+        else:
+            self.buffer_data[data] = count - 1
+        self.used_space -= data.size
+        return data
 
     def delete_data_list(self, data_list):
         """
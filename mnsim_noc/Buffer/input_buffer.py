@@ -9,7 +9,7 @@
 @CreateTime:
     2022/05/07 10:15
 """
-from mnsim_noc.Buffer.base_buffer import BaseBuffer, get_data_size
+from mnsim_noc.Buffer.base_buffer import BaseBuffer, get_data_block, get_data_size
 
 class InputBuffer(BaseBuffer):
     """
@@ -19,10 +19,13 @@ class InputBuffer(BaseBuffer):
     def __init__(self, buffer_size):
         super(InputBuffer, self).__init__(buffer_size)
         # for input buffer, there may be transfer data to add
-        self.transfer_data = []
+        self.transfer_data = dict()
         self.transfer_data_size = 0
-        # cache for check already
-        self.cache = {}
+        # readiness tracker for the waited data list of the pending computation
+        # the number of the waited data not in the buffer
+        self.wait_data_list = None
+        self.wait_data = set()
+        self.wait_missing_number = 0
         self.start_flag = False
 
     def check_remain_size(self):
@@ -42,8 +45,9 @@ class InputBuffer(BaseBuffer):
         """
         add one data to the transfer data
         """
-        self.transfer_data.append(data)
-        self.transfer_data_size += get_data_size(data)
+        data = get_data_block(data)
+        self.transfer_data[data] = self.transfer_data.get(data, 0) + 1
+        self.transfer_data_size += data.size
 
     def add_transfer_data_list(self, data_list):
         """
@@ -56,8 +60,13 @@ class InputBuffer(BaseBuffer):
         """
         delete one data in the transfer data
         """
-        self.transfer_data.remove(data)
-        self.transfer_data_size -= get_data_size(data)
+        data = get_data_block(data)
+        count = self.transfer_data[data]
+        if count == 1:
+            del self.transfer_data[data]
+        else:
+            self.transfer_data[data] = count - 1
+        self.transfer_data_size -= data.size
 
     def delete_transfer_data_list(self, data_list):
         """
@@ -75,23 +84,45 @@ class InputBuffer(BaseBuffer):
         self.delete_transfer_data_list(data_list)
         # add data list
         super(InputBuffer, self).add_data_list(data_list)
-        # clear the cache
-        self.cache.clear()
+
+    def _add_one(self, data):
+        """
+        add one data to the buffer, and update the readiness tracker
+        """
+        data = super(InputBuffer, self)._add_one(data)
+        if self.buffer_data[data] == 1 and data in self.wait_data:
+            self.wait_missing_number -= 1
+        return data
+
+    def _delete_one(self, data):
+        """
+        delete one data in the buffer, and update the readiness tracker
+        """
+        data = super(InputBuffer, self)._delete_one(data)
+        if data not in self.buffer_data and data in self.wait_data:
+            self.wait_missing_number += 1
+        return data
+
+    def _set_wait_data_list(self, data_list):
+        """
+        set the waited data list, and count the data not in the buffer
+        """
+        self.wait_data_list = data_list
+        self.wait_data = set(get_data_block(data) for data in data_list)
+        self.wait_missing_number = sum(
+            [1 for data in self.wait_data if data not in self.buffer_data]
+        )
 
     def check_data_already(self, data_list):
         """
         check if the data is already in the buffer
+        the tracker is kept while the same data list is waited
         """
         if self.start_flag:
             return True
-        key = str(data_list)
-        if key in self.cache:
-            return self.cache[key]
-        else:
-            # check the data already
-            value = all([data in self.buffer_data for data in data_list])
-            self.cache[key] = value
-            return value
+        if data_list is not self.wait_data_list:
+            self._set_wait_data_list(data_list)
+        return self.wait_missing_number == 0
 
     def delete_data_list(self, data_list):
         """
@@ -99,7 +130,6 @@ class InputBuffer(BaseBuffer):
         """
         if not self.start_flag:
             super(InputBuffer, self).delete_data_list(data_list)
-            self.cache.clear()
 
     def set_start(self):
         """
@@ -10,6 +10,7 @@
     2022/05/09 15:05
 """
 from mnsim_noc.utils.component import Component
+from mnsim_noc.utils.wake_up import WakeUp
 from mnsim_noc.Buffer.base_buffer import get_data_tile
 from mnsim_noc.Buffer.input_buffer import InputBuffer
 
@@ -27,6 +28,14 @@ class MultiInputBuffer(Component):
         for source_tile_id in self.input_source_id:
             self.input_buffer_dict[str(source_tile_id)] = \
                 InputBuffer(buffer_size // len(self.input_source_id))
+        # wake up, data for the new data, space for the released space of each source
+        self.data_wake_up = WakeUp()
+        self.space_wake_up = dict(
+            (str(source_tile_id), WakeUp()) for source_tile_id in self.input_source_id
+        )
+        # split cache for the waited data list
+        self.split_data_list = None
+        self.split_data_dict = None
         # check
         self.start_flag = False
         assert len(input_source_id) > 0, "input source id is empty"
@@ -50,6 +59,7 @@ class MultiInputBuffer(Component):
         add data list to the buffer
         """
         self.input_buffer_dict[str(source_tile_id)].add_data_list(data_list)
+        self.data_wake_up()
 
     def _split_data_list(self, data_list):
         """
@@ -58,8 +68,7 @@ class MultiInputBuffer(Component):
         split_data_dict = dict()
         for data in data_list:
             source_tile_id = get_data_tile(data)
-            split_data_dict[str(source_tile_id)] = \
-                split_data_dict.get(str(source_tile_id), []) + [data]
+            split_data_dict.setdefault(str(source_tile_id), []).append(data)
         return split_data_dict
 
     def check_data_already(self, data_list):
@@ -68,8 +77,11 @@ class MultiInputBuffer(Component):
         """
         if self.start_flag:
             return True
-        split_data_dict = self._split_data_list(data_list)
-        for k, v in split_data_dict.items():
+        # the same data list is waited until the computation starts
+        if data_list is not self.split_data_list:
+            self.split_data_list = data_list
+            self.split_data_dict = self._split_data_list(data_list)
+        for k, v in self.split_data_dict.items():
             if not self.input_buffer_dict[k].check_data_already(v):
                 return False
         return True
@@ -83,6 +95,7 @@ class MultiInputBuffer(Component):
         split_data_dict = self._split_data_list(data_list)
         for k, v in split_data_dict.items():
             self.input_buffer_dict[k].delete_data_list(v)
+            self.space_wake_up[k]()
 
     def set_start(self):
         """
@@ -4,28 +4,91 @@
     multi_output_buffer.py
 @Description:
     multi output buffer for multi output
+    the data are stored once and shared by the targets, with the reference count
 @Authors:
     Hanbo Sun(sun-hb17@mails.tsinghua.edu.cn)
 @CreateTime:
     2022/05/07 19:53
 """
 from mnsim_noc.utils.component import Component
-from mnsim_noc.Buffer.output_buffer import OutputBuffer
+from mnsim_noc.utils.wake_up import WakeUp
+from mnsim_noc.Buffer.base_buffer import DataOrder, get_data_block, get_data_size
+
+class SharedData(object):
+    """
+    copy count of the shared data
+    the copies are added for all targets and deleted by each target,
+    the stored number is the max kept number of the targets,
+    the added number minus the min deleted number, tracked with the count of each deleted number
+    """
+    __slots__ = ["add_number", "delete_number", "min_delete_number", "delete_number_count"]
+    def __init__(self, target_number):
+        self.add_number = 0
+        self.delete_number = [0] * target_number
+        self.min_delete_number = 0
+        self.delete_number_count = {0: target_number}
+
+    def add(self):
+        """
+        add one copy for all targets, one more stored copy
+        """
+        self.add_number += 1
+
+    def delete(self, i):
+        """
+        delete one copy of the i-th target, return True if one stored copy is released
+        """
+        number = self.delete_number[i]
+        self.delete_number[i] = number + 1
+        self.delete_number_count[number + 1] = self.delete_number_count.get(number + 1, 0) + 1
+        if self.delete_number_count[number] > 1:
+            self.delete_number_count[number] -= 1
+            return False
+        del self.delete_number_count[number]
+        if number != self.min_delete_number:
+            return False
+        self.min_delete_number += 1
+        return True
+
+    def get_stored_number(self):
+        """
+        get the stored number
+        """
+        return self.add_number - self.min_delete_number
 
 class MultiOutputBuffer(Component):
     """
     multi output buffer
+    the data are stored once, and each target has its own FIFO order on the shared data,
+    the data is released when all targets have deleted it
+    each target has the budget of the buffer size as before, so the schedule is not changed
     """
     REGISTRY = "multi_buffer"
     NAME = "behavior_buffer_output"
     def __init__(self, buffer_size, output_target_id):
         super(MultiOutputBuffer, self).__init__()
         # init multi output buffer, id with target
+        self.buffer_size = buffer_size
         self.output_target_id = output_target_id
-        self.output_buffer_dict = dict()
-        for target_tile_id in self.output_target_id:
-            self.output_buffer_dict[str(target_tile_id)] = \
-                OutputBuffer(buffer_size)
+        self.target_index = dict(
+            (str(target_tile_id), i) for i, target_tile_id in enumerate(self.output_target_id)
+        )
+        # data -> shared data, and the stored space of the shared data
+        self.buffer_data = dict()
+        self.used_space = 0
+        # the space of each target, the FIFO order, the deleted data are removed lazily
+        self.target_used_space = [0] * len(self.output_target_id)
+        self.buffer_order = [DataOrder() for _ in self.output_target_id]
+        # the max space of the targets and the number of the targets on it,
+        # rescanned only when the last target on the max deletes
+        self.max_used_space = 0
+        self.max_target_number = len(self.output_target_id)
+        self.end_flag = False
+        # wake up, data for the new data of each target, space for the released space
+        self.data_wake_up = dict(
+            (str(target_tile_id), WakeUp()) for target_tile_id in self.output_target_id
+        )
+        self.space_wake_up = WakeUp()
         # assert output target id
         assert len(output_target_id) > 0, "output target id is empty"
         if len(output_target_id) == 1 and output_target_id[0] == -1:
@@ -35,40 +98,84 @@ class MultiOutputBuffer(Component):
         """
         check if the buffer has enough space to add the data
         """
-        enough = [output_buffer.check_enough_space(data_list)
-            for output_buffer in self.output_buffer_dict.values()
-        ]
-        return all(enough)
+        if self.end_flag:
+            return True
+        data_size = sum([get_data_size(data) for data in data_list])
+        return self.max_used_space + data_size <= self.buffer_size
 
     def add_data_list(self, data_list):
         """
-        add data list to the buffer
+        add data list to the buffer, the end buffer keeps no data
         """
-        for output_buffer in self.output_buffer_dict.values():
-            output_buffer.add_data_list(data_list)
+        if not self.end_flag:
+            for data in data_list:
+                data = get_data_block(data)
+                shared_data = self.buffer_data.get(data)
+                if shared_data is None:
+                    shared_data = SharedData(len(self.output_target_id))
+                    self.buffer_data[data] = shared_data
+                # one more stored copy for all targets
+                shared_data.add()
+                for i, order in enumerate(self.buffer_order):
+                    self.target_used_space[i] += data.size
+                    order.append(data)
+                self.used_space += data.size
+                self.max_used_space += data.size
+        for data_wake_up in self.data_wake_up.values():
+            data_wake_up()
 
     def next_transfer_data(self, target_tile_id):
         """
         get the next transfer data of the target tile id
         """
-        return self.output_buffer_dict[str(target_tile_id)].next_transfer_data()
+        if self.end_flag:
+            return None
+        order = self.buffer_order[self.target_index[str(target_tile_id)]]
+        if len(order) == 0:
+            return None
+        return [order.get_head()]
+
+    def _delete_one(self, data, i):
+        """
+        delete one data of the i-th target
+        the first same data in the FIFO order is removed,
+        lazily if it is not the head, the head is always alive
+        """
+        data = get_data_block(data)
+        shared_data = self.buffer_data[data]
+        # the stored copy is released when no target keeps it
+        if shared_data.delete(i):
+            self.used_space -= data.size
+            if shared_data.get_stored_number() == 0:
+                del self.buffer_data[data]
+        # the max space of the targets
+        if self.target_used_space[i] == self.max_used_space:
+            self.max_target_number -= 1
+        self.target_used_space[i] -= data.size
+        if self.max_target_number == 0:
+            self.max_used_space = max(self.target_used_space)
+            self.max_target_number = self.target_used_space.count(self.max_used_space)
+        self.buffer_order[i].delete(data)
+        return None
 
     def delete_data_list(self, data_list, target_tile_id):
         """
         delete data list from the buffer
         """
-        return self.output_buffer_dict[str(target_tile_id)].delete_data_list(data_list)
+        i = self.target_index[str(target_tile_id)]
+        for data in data_list:
+            self._delete_one(data, i)
+        self.space_wake_up()
 
     def set_end(self):
         """
         set end flag
         """
-        for output_buffer in self.output_buffer_dict.values():
-            output_buffer.set_end()
+        self.end_flag = True
 
     def check_finish(self):
         """
         check if the buffer is finished
         """
-        for output_buffer in self.output_buffer_dict.values():
-            output_buffer.check_finish()
+        if not self.end_flag:
+            assert len(self.buffer_data) == 0, "the buffer is not empty"
@@ -9,7 +9,7 @@
 @CreateTime:
     2022/05/07 10:51
 """
-from mnsim_noc.Buffer.base_buffer import BaseBuffer, get_data_size
+from mnsim_noc.Buffer.base_buffer import BaseBuffer, DataOrder, get_data_size
 
 class OutputBuffer(BaseBuffer):
     """
@@ -19,6 +19,8 @@ class OutputBuffer(BaseBuffer):
     def __init__(self, buffer_size):
         super(OutputBuffer, self).__init__(buffer_size)
         self.end_flag = False
+        # FIFO order of the data, the deleted data are removed lazily
+        self.buffer_order = DataOrder()
 
     def check_remain_size(self):
         """
@@ -35,16 +37,42 @@ class OutputBuffer(BaseBuffer):
         data_size = sum([get_data_size(data) for data in data_list])
         return self.check_remain_size() >= data_size
 
+    def add_data_list(self, data_list):
+        """
+        add list data to the buffer, the end buffer keeps no data
+        """
+        if self.end_flag:
+            return None
+        return super(OutputBuffer, self).add_data_list(data_list)
+
+    def _add_one(self, data):
+        """
+        add one data to the buffer, and the FIFO order
+        """
+        data = super(OutputBuffer, self)._add_one(data)
+        self.buffer_order.append(data)
+        return data
+
+    def _delete_one(self, data):
+        """
+        delete one data in the buffer
+        the first same data in the FIFO order is removed,
+        lazily if it is not the head, the head is always alive
+        """
+        data = super(OutputBuffer, self)._delete_one(data)
+        self.buffer_order.delete(data)
+        return data
+
     def next_transfer_data(self):
         """
         get the next transfer data
         """
         if self.end_flag:
             return None
-        if len(self.buffer_data) == 0:
+        if len(self.buffer_order) == 0:
             return None
         else:
-            return [self.buffer_data[0]]
+            return [self.buffer_order.get_head()]
 
     def set_end(self):
         """
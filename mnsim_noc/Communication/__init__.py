@@ -1,2 +1,3 @@
 #-*-coding:utf-8-*-
-from mnsim_noc.Communication.base_communication import BaseCommunication
\ No newline at end of file
+from mnsim_noc.Communication.base_communication import BaseCommunication
+from mnsim_noc.Communication.multicast_communication import MulticastCommunication
@@ -10,6 +10,8 @@
     2022/05/07 17:38
 """
 from mnsim_noc.utils.component import Component
+from mnsim_noc.utils.wake_up import WakeUp
+from mnsim_noc.utils.statistics import RangeStatistics
 from mnsim_noc.Tile import BaseTile
 from mnsim_noc.Wire import WireNet
 
@@ -28,6 +30,7 @@ class BaseCommunication(Component):
         # set input tile and output tile
         self.input_tile = input_tile
         self.output_tile = output_tile
+        self.output_tile_list = [output_tile]
         self.wire_net = wire_net
         # input buffer and output buffer, for tile
         self.output_buffer = self.input_tile.output_buffer
@@ -38,6 +41,13 @@ class BaseCommunication(Component):
         self.running_state = False
         self.communication_end_time = float("inf")
         self.communication_range_time = []
+        # running statistics, the range list is not kept in the statistics mode
+        self.statistics_flag = False
+        self.communication_statistics = RangeStatistics()
+        # wake up when the running state changes
+        self.state_wake_up = WakeUp()
+        # trace sink for the communication and wire events
+        self.trace_sink = None
         # transfer data and path
         self.transfer_data = None
         self.transfer_path = None
@@ -46,6 +56,18 @@ class BaseCommunication(Component):
             f"{input_tile.task_id},{input_tile.tile_id}"+\
             f"->{output_tile.task_id},{output_tile.tile_id}"
 
+    def set_statistics_flag(self, statistics_flag):
+        """
+        set the statistics flag, True for no range list
+        """
+        self.statistics_flag = statistics_flag
+
+    def set_trace_sink(self, trace_sink):
+        """
+        set the trace sink, None for no trace
+        """
+        self.trace_sink = trace_sink
+
     def update(self, current_time):
         """
         since there may be multiple communication
@@ -56,11 +78,22 @@ class BaseCommunication(Component):
                 # PHASE COMMUNICATION END
                 # NO next communication
                 self.running_state = False
-                self.input_buffer.add_data_list(self.transfer_data, self.source_tile_id)
+                self._end_transfer_data()
                 # clear transfer data path
                 self.wire_net.set_data_path_state(
                     self.transfer_path, False, self.communication_id, current_time
                 )
+                self.state_wake_up()
+
+    def get_wake_up_list(self):
+        """
+        get the wake up list, the communication may be ready when one of them wakes up
+        """
+        return [
+            self.state_wake_up,
+            self.output_buffer.data_wake_up[str(self.target_tile_id)],
+            self.input_buffer.space_wake_up[str(self.source_tile_id)],
+        ]
 
     def check_communication_ready(self):
         """
@@ -76,6 +109,19 @@ class BaseCommunication(Component):
             return True
         return False
 
+    def _start_transfer_data(self):
+        """
+        start the transfer data, from the output buffer to the transfer data of the input buffer
+        """
+        self.input_buffer.add_transfer_data_list(self.transfer_data, self.source_tile_id)
+        self.output_buffer.delete_data_list(self.transfer_data, self.target_tile_id)
+
+    def _end_transfer_data(self):
+        """
+        end the transfer data, into the input buffer
+        """
+        self.input_buffer.add_data_list(self.transfer_data, self.source_tile_id)
+
     def set_communication_task(self, current_time, trasnfer_path, transfer_time):
         """
         transfer path can be None, means no communication
@@ -89,13 +135,24 @@ class BaseCommunication(Component):
         self.running_state = True
         self.transfer_path = trasnfer_path
         # set buffer
-        self.input_buffer.add_transfer_data_list(self.transfer_data, self.source_tile_id)
-        self.output_buffer.delete_data_list(self.transfer_data, self.target_tile_id)
+        self._start_transfer_data()
         # get transfet time
         self.communication_end_time = current_time + transfer_time
-        self.communication_range_time.append((current_time, self.communication_end_time))
+        if not self.statistics_flag:
+            self.communication_range_time.append((current_time, self.communication_end_time))
+        self.communication_statistics.add(current_time, self.communication_end_time)
         # set wire state, in schedule
         self.wire_net.set_data_path_state(self.transfer_path, True, self.communication_id, current_time)
+        if self.trace_sink is not None:
+            self.trace_sink.add_event(
+                "communication", self.communication_id, current_time, self.communication_end_time
+            )
+            for wire_id in self.wire_net.get_path_index(self.transfer_path).tolist():
+                self.trace_sink.add_event(
+                    "wire", self.wire_net.get_wire_name(wire_id), current_time,
+                    self.communication_end_time, self.communication_id
+                )
+        self.state_wake_up()
         return None
 
     def get_communication_end_time(self):
@@ -111,6 +168,8 @@ class BaseCommunication(Component):
         """
         get the range of the communication
         """
+        assert not self.statistics_flag, \
+            "the range list is not kept in the statistics mode, use communication_statistics"
         return self.communication_range_time
 
     def check_finish(self):
@@ -126,7 +185,4 @@ class BaseCommunication(Component):
         get the simulation result
         """
         self.check_finish()
-        communication_time = sum([
-            end - start for start, end in self.communication_range_time
-        ])
-        return communication_time * 1. / end_time
+        return self.communication_statistics.busy_time * 1. / end_time
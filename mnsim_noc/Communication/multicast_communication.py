@@ -0,0 +1,72 @@
+#-*-coding:utf-8-*-
+"""
+@FileName:
+    multicast_communication.py
+@Description:
+    multicast communication class, one send to all target tiles along the tree route
+@CreateTime:
+    2026/10/17 04:10
+"""
+from mnsim_noc.Communication.base_communication import BaseCommunication
+
+class MulticastCommunication(BaseCommunication):
+    """
+    multicast communication class for behavior-driven simulation
+    data from input tile to all output tiles in one transfer,
+    the output buffer keeps the same FIFO order for all targets, and the data is deleted
+    for all targets at the start of the transfer
+    """
+    NAME = "multicast"
+    def __init__(self, input_tile, output_tile_list, wire_net):
+        """
+        init multicast communication
+        data from input tile to all output tiles
+        """
+        super(MulticastCommunication, self).__init__(input_tile, output_tile_list[0], wire_net)
+        self.output_tile_list = output_tile_list
+        self.input_buffer_list = [output_tile.input_buffer for output_tile in output_tile_list]
+        self.target_tile_id_list = [output_tile.tile_id for output_tile in output_tile_list]
+        self.communication_id = \
+            f"{input_tile.task_id},{input_tile.tile_id}->{input_tile.task_id}," + \
+            "|".join([str(target_tile_id) for target_tile_id in self.target_tile_id_list])
+
+    def get_wake_up_list(self):
+        """
+        get the wake up list, the data wakes up all targets at the same time
+        """
+        return [
+            self.state_wake_up,
+            self.output_buffer.data_wake_up[str(self.target_tile_id)],
+        ] + [
+            input_buffer.space_wake_up[str(self.source_tile_id)]
+            for input_buffer in self.input_buffer_list
+        ]
+
+    def check_communication_ready(self):
+        """
+        check if this communication can transfer data to all targets
+        """
+        if self.running_state:
+            return False
+        self.transfer_data = self.output_buffer.next_transfer_data(self.target_tile_id)
+        if self.transfer_data is None:
+            return False
+        for input_buffer in self.input_buffer_list:
+            if not input_buffer.check_enough_space(self.transfer_data, self.source_tile_id):
+                return False
+        return True
+
+    def _start_transfer_data(self):
+        """
+        start the transfer data for all targets
+        """
+        for input_buffer, target_tile_id in zip(self.input_buffer_list, self.target_tile_id_list):
+            input_buffer.add_transfer_data_list(self.transfer_data, self.source_tile_id)
+            self.output_buffer.delete_data_list(self.transfer_data, target_tile_id)
+
+    def _end_transfer_data(self):
+        """
+        end the transfer data, into all input buffers
+        """
+        for input_buffer in self.input_buffer_list:
+            input_buffer.add_data_list(self.transfer_data, self.source_tile_id)
@@ -2,4 +2,11 @@
 from mnsim_noc.Strategy.mapping import Mapping
 from mnsim_noc.Strategy.mapping import NaiveMapping
 from mnsim_noc.Strategy.schedule import Schedule
-from mnsim_noc.Strategy.schedule import NaiveSchedule
\ No newline at end of file
+from mnsim_noc.Strategy.schedule import NaiveSchedule
+from mnsim_noc.Strategy.schedule import AdaptiveSchedule
+from mnsim_noc.Strategy.schedule import MinimalPathSchedule
+from mnsim_noc.Strategy.schedule import PrioritySchedule
+from mnsim_noc.Strategy.schedule import CriticalSchedule
+from mnsim_noc.Strategy.schedule import StarvationSchedule
+from mnsim_noc.Strategy.schedule import AgeSchedule
+from mnsim_noc.Strategy.schedule import WormholeSchedule
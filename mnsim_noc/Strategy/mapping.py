@@ -10,15 +10,11 @@
     2022/05/07 20:43
 """
 import abc
-import copy
-from hashlib import new
-import random
+import numpy as np
 from mnsim_noc.utils.component import Component
 from mnsim_noc.Tile import BaseTile
 from mnsim_noc.Wire import WireNet
-from mnsim_noc.Communication import BaseCommunication
-from numpy import sort
-from torch import rand
+from mnsim_noc.Communication import BaseCommunication, MulticastCommunication
 
 class Mapping(Component):
     """
@@ -26,7 +22,7 @@ class Mapping(Component):
     """
     REGISTRY = "mapping"
     def __init__(self, task_behavior_list, image_num,
-        tile_net_shape, buffer_size, band_width
+        tile_net_shape, buffer_size, band_width, mapping_config=None
     ):
         super(Mapping, self).__init__()
         self.task_behavior_list = task_behavior_list
@@ -35,6 +31,16 @@ class Mapping(Component):
         self.tile_column = tile_net_shape[1]
         self.buffer_size = buffer_size
         self.band_width = band_width
+        # config for the mapping strategy
+        self.mapping_config = {} if mapping_config is None else mapping_config
+        # config of the array besides the mapping, for the mapping in the simulation loop
+        self.array_config = {}
+
+    def set_array_config(self, array_config):
+        """
+        set the array config besides the mapping, the keys are the same as the config file
+        """
+        self.array_config = array_config
 
     @abc.abstractmethod
     def _get_position_list(self, tile_behavior_list):
@@ -59,9 +65,10 @@ class Mapping(Component):
             assert 0 <= position[0] < self.tile_row and 0 <= position[1] < self.tile_column, \
                 "all position should be inside the range of tile_net_shape"
 
-    def mapping_net(self):
+    def mapping_net(self, multicast_flag=False):
         """
         mapping net
+        multicast_flag: one multicast communication for the tile with multiple targets
         """
         tile_behavior_list = []
         for task_id, task_behavior in enumerate(self.task_behavior_list):
@@ -84,11 +91,25 @@ class Mapping(Component):
         for start_tile in tile_list:
             end_tile_task_id = start_tile.task_id
             end_target_tile_id_list = start_tile.target_tile_id
-            for end_tile in tile_list:
+            end_tile_list = [
+                end_tile for end_tile in tile_list
                 if end_tile.task_id == end_tile_task_id \
-                    and end_tile.tile_id in end_target_tile_id_list:
-                    communication = BaseCommunication(start_tile, end_tile, wire_net)
-                    communication_list.append(communication)
+                    and end_tile.tile_id in end_target_tile_id_list
+            ]
+            if multicast_flag and len(end_tile_list) > 1:
+                communication_list.append(
+                    MulticastCommunication(start_tile, end_tile_list, wire_net)
+                )
+                continue
+            for end_tile in end_tile_list:
+                communication = BaseCommunication(start_tile, end_tile, wire_net)
+                communication_list.append(communication)
+        # route table, the path is static after mapping
+        wire_net.route_table.build([
+            (communication.input_tile.position, output_tile.position)
+            for communication in communication_list
+            for output_tile in communication.output_tile_list
+        ])
         return tile_list, communication_list, wire_net
 
     def get_update_order(self, tile_list, communication_list):
@@ -100,8 +121,8 @@ class Mapping(Component):
         for tile in tile_list:
             # first, communication output tile is this tile
             for communication in communication_list:
-                if communication.output_tile is tile and \
-                    id(communication) not in communication_in_ids:
+                if any([output_tile is tile for output_tile in communication.output_tile_list]) \
+                    and id(communication) not in communication_in_ids:
                     communication_in_ids.append(id(communication))
                     update_module.append(communication)
             # this tile
@@ -156,88 +177,118 @@ class SnakeMapping(Mapping):
         # return list
         return position_list[:len(tile_behavior_list)]
     
+class GivenMapping(Mapping):
+    """
+    given mapping, the position list is in the mapping config
+    """
+    NAME = "given"
+    def _get_position_list(self, tile_behavior_list):
+        """
+        get position list
+        """
+        return [tuple(position) for position in self.mapping_config["position_list"]]
+
 class CommunicationWiseMapping(Mapping):
     """
     Communication-Wise mapping, designed to minimize the total communication
+    the free cells and the distance field to the mapped tiles are kept in arrays,
+    the distance field is only updated in the window the new tile can change,
+    and the count of the cells on each distance gives the max distance
     """
     NAME = "commwise"
-    
-    def get_nearest_pos(self, pos, map_list):
+
+    def _init_cell_state(self):
+        """
+        init the free cells and the distance field
+        the distance field is the min of the border distance and the distance to the mapped tiles
+        """
+        cell_row, cell_column = np.divmod(
+            np.arange(self.tile_row * self.tile_column), self.tile_column
+        )
+        self.free_cell = np.ones((self.tile_row, self.tile_column), dtype=bool)
+        self.distance_field = np.minimum.reduce([
+            self.tile_row - cell_row, cell_row + 1,
+            self.tile_column - cell_column, cell_column + 1
+        ]).reshape(self.tile_row, self.tile_column)
+        self.distance_count = np.bincount(
+            self.distance_field.ravel(), minlength=self.tile_row + self.tile_column
+        )
+        self.max_distance = int(self.distance_field.max())
+
+    def _set_position(self, position_list, tile, loc):
+        """
+        map the tile on the loc, and update the cell state
+        only the cells closer than the max distance can be changed
+        """
+        position_list[tile] = loc
+        self.free_cell[loc] = False
+        radius = self.max_distance
+        row_slice = slice(max(loc[0] - radius + 1, 0), min(loc[0] + radius, self.tile_row))
+        column_slice = slice(
+            max(loc[1] - radius + 1, 0), min(loc[1] + radius, self.tile_column)
+        )
+        window = self.distance_field[row_slice, column_slice]
+        minlength = len(self.distance_count)
+        self.distance_count -= np.bincount(window.ravel(), minlength=minlength)
+        np.minimum(
+            window,
+            np.abs(np.arange(row_slice.start, row_slice.stop) - loc[0])[:, None] + \
+                np.abs(np.arange(column_slice.start, column_slice.stop) - loc[1]),
+            out=window
+        )
+        self.distance_count += np.bincount(window.ravel(), minlength=minlength)
+        self.max_distance = int(np.flatnonzero(self.distance_count)[-1])
+
+    def get_nearest_pos(self, pos):
         """
         get the nearest empty space
+        in the diamond order on each distance, from (-d, 0) clockwise to (d, 0),
+        then from (d, -1) to (-d + 1, -1)
+        only the rings up to the nearest empty space are walked
         Args:
             pos
-            map_list
         """
-        for distance in range(1,self.tile_row+self.tile_column-1):
-            for loc in [(i+pos[0],distance-abs(i)+pos[1]) for i in range(-distance,distance)]+[(i+pos[0],abs(i)-distance+pos[1]) for i in range(distance,-distance,-1)]:
-                if 0<=loc[0]<self.tile_row and 0<=loc[1]<self.tile_column and map_list[loc[0]][loc[1]] == -1:
+        for distance in range(1, self.tile_row + self.tile_column - 1):
+            for i in range(-distance, distance):
+                loc = (pos[0] + i, pos[1] + distance - abs(i))
+                if 0 <= loc[0] < self.tile_row and 0 <= loc[1] < self.tile_column \
+                    and self.free_cell[loc]:
                     return loc
-    
-    def get_best_point(self, position_list):
+            for i in range(distance, -distance, -1):
+                loc = (pos[0] + i, pos[1] + abs(i) - distance)
+                if 0 <= loc[0] < self.tile_row and 0 <= loc[1] < self.tile_column \
+                    and self.free_cell[loc]:
+                    return loc
+        return None
+
+    def get_best_point(self):
         """
-        get the most open point
-        Args:
-            position_list
-            map_list
-        """
-        loc = None
-        wide = 0
-        for row in range(0,self.tile_row):
-            for column in range(0,self.tile_column):
-                pos_tmp = (row,column)
-                # already mapped
-                if pos_tmp in position_list:
-                    continue
-                # search in position_list
-                dis = min([self.tile_row-row,row+1,self.tile_column-column,column+1])
-                for pos in position_list:
-                    if pos:
-                        dis = min(dis,abs(pos[0]-row)+abs(pos[1]-column))
-                # update the best point
-                if dis > wide:
-                    loc = pos_tmp
-                    wide = dis
-        return loc
-    
+        get the most open point, the first one in the row-major order
+        the max distance is kept by the distance count, the cell is found by one scan
+        """
+        if self.max_distance <= 0:
+            return None
+        loc = int((self.distance_field == self.max_distance).argmax())
+        return (loc // self.tile_column, loc % self.tile_column)
+
     def _get_position_list(self, tile_behavior_list):
         """
         get position list
-        
+
         variables:
-            data_matrix: 
-                total data size transferred from tile[i] -> tile[j]
-            rank_list: 
-                [((tile_id,target_tile_id),transfer_amount)]
-            map_list:
-                mesh[i][j] is reserved for tile x
+            source, target, weight:
+                the communications ranked by the transferred data amount
+            free_cell, distance_field:
+                the cell state
             position_list:
                 tile x is mapped to (i,j)
         """
         # rank the transferred data amount between tiles
-        data_dict = dict()
-        data_matrix = [[0]*len(tile_behavior_list) for _ in range(0,len(tile_behavior_list))]
-        for tile_behavior in tile_behavior_list:
-            tile_id = tile_behavior["tile_id"]
-            target_tile_list = tile_behavior["target_tile_id"]
-            transfer_list = tile_behavior["dependence"]
-            transfer_amount = 0
-            for data in transfer_list:
-                outputs = data["output"]
-                for output in outputs:
-                    transfer_amount += (output[3] - output[2]) * output[4]
-            for target_tile_id in target_tile_list:
-                if target_tile_id >= 0:
-                    data_dict[(tile_id,target_tile_id)] = transfer_amount
-                    data_matrix[tile_id][target_tile_id] = transfer_amount
-        # info for mapping
-        rank_list = sorted(data_dict.items(),key=lambda s:s[1],reverse=True)    #[((tile_id,target_tile_id),transfer_amount)]
-        map_list = [[-1]*self.tile_column for _ in range(0,self.tile_row)]
+        source, target, _ = get_communication_weight(tile_behavior_list)
+        self._init_cell_state()
         position_list = [None]*len(tile_behavior_list)
         # try for the best mapping
-        for link in rank_list:
-            tile_1 = link[0][0]
-            tile_2 = link[0][1]
+        for tile_1, tile_2 in zip(source.tolist(), target.tolist()):
             pos_1 = position_list[tile_1]
             pos_2 = position_list[tile_2]
             if pos_1:
@@ -245,188 +296,584 @@ class CommunicationWiseMapping(Mapping):
                     # TODO: adjust the pos to ahieve lower communication latency
                     pass
                 else:
-                    loc = self.get_nearest_pos(pos_1, map_list)
-                    position_list[tile_2] = loc
-                    map_list[loc[0]][loc[1]] = tile_2
+                    self._set_position(position_list, tile_2, self.get_nearest_pos(pos_1))
             else:
                 if pos_2:
-                    loc = self.get_nearest_pos(pos_2, map_list)
-                    position_list[tile_1] = loc
-                    map_list[loc[0]][loc[1]] = tile_1
+                    self._set_position(position_list, tile_1, self.get_nearest_pos(pos_2))
                 else:
                     # map the first tile on the best point
-                    loc_1 = self.get_best_point(position_list)
-                    position_list[tile_1] = loc_1
-                    map_list[loc_1[0]][loc_1[1]] = tile_1
+                    loc_1 = self.get_best_point()
+                    self._set_position(position_list, tile_1, loc_1)
                     # map the second tile on the nearest place
-                    loc_2 = self.get_nearest_pos(loc_1, map_list)
-                    position_list[tile_2] = loc_2
-                    map_list[loc_2[0]][loc_2[1]] = tile_2
+                    self._set_position(position_list, tile_2, self.get_nearest_pos(loc_1))
         return position_list
 
-# class for individuals and its behaviour
-class Individual:
-    def __init__(self, tile_row, tile_column, tile_num, rank_list):
-        self.tile_row = tile_row
-        self.tile_column = tile_column
+def get_communication_weight(tile_behavior_list):
+    """
+    get the communication weight between tiles
+    return the source index, target index and weight arrays in the order of the tile list,
+    sorted by the weight, descending
+    """
+    tile_index_map = dict(
+        ((tile_behavior["task_id"], tile_behavior["tile_id"]), i)
+        for i, tile_behavior in enumerate(tile_behavior_list)
+    )
+    link_list = []
+    for i, tile_behavior in enumerate(tile_behavior_list):
+        transfer_amount = 0
+        for data in tile_behavior["dependence"]:
+            for output in data["output"]:
+                transfer_amount += (output[3] - output[2]) * output[4]
+        for target_tile_id in tile_behavior["target_tile_id"]:
+            if target_tile_id >= 0:
+                link_list.append((
+                    i, tile_index_map[(tile_behavior["task_id"], target_tile_id)],
+                    transfer_amount
+                ))
+    link_list = sorted(link_list, key=lambda s: s[2], reverse=True)
+    source = np.array([link[0] for link in link_list], dtype=np.int64)
+    target = np.array([link[1] for link in link_list], dtype=np.int64)
+    weight = np.array([link[2] for link in link_list], dtype=np.float64)
+    return source, target, weight
+
+class MappingPopulation(object):
+    """
+    population of the mappings
+    position is an (N, tile_num, 2) array, -1 for the unmapped tile
+    all individuals are mapped and mutated together
+    """
+    def __init__(self, tile_net_shape, tile_num, source, target, weight, seed=None):
+        self.tile_row, self.tile_column = tile_net_shape
         self.tile_num = tile_num
-        self.total_comm = 0
-        self.rank_list = rank_list
-        self.map_list = [[-1]*self.tile_column for _ in range(0,self.tile_row)]
-        self.position_list = [None]*tile_num
-    # tool fuctions for mapping
-    def get_nearest_pos(self, pos, map_list):
-        for distance in range(1,self.tile_row+self.tile_column-1):
-            loc_list = []
-            for loc in [(i+pos[0],distance-abs(i)+pos[1]) for i in range(-distance,distance)]+[(i+pos[0],abs(i)-distance+pos[1]) for i in range(distance,-distance,-1)]:
-                if 0<=loc[0]<self.tile_row and 0<=loc[1]<self.tile_column and map_list[loc[0]][loc[1]] == -1:
-                    loc_list.append(loc)
-            if loc_list:
-                return loc_list[random.randint(0,len(loc_list)-1)]
-    def get_random_point(self, position_list):
-        """
-        get a random point
-        """
-        loc_list = []
-        for row in range(0,self.tile_row):
-            for column in range(0,self.tile_column):
-                pos_tmp = (row,column)
-                # already mapped
-                if pos_tmp in position_list:
-                    continue
-                loc_list.append(pos_tmp)
-        # random choose
-        loc = loc_list[random.randint(0,len(loc_list)-1)]
-        return loc
-    # rendom initialize
-    def random_mapping(self):
-        for link in self.rank_list:
-            tile_1 = link[0][0]
-            tile_2 = link[0][1]
-            pos_1 = self.position_list[tile_1]
-            pos_2 = self.position_list[tile_2]
-            if pos_1:
-                if pos_2:
-                    continue
-                else:
-                    loc = self.get_nearest_pos(pos_1, self.map_list)
-                    self.position_list[tile_2] = loc
-                    self.map_list[loc[0]][loc[1]] = tile_2
-            else:
-                if pos_2:
-                    loc = self.get_nearest_pos(pos_2, self.map_list)
-                    self.position_list[tile_1] = loc
-                    self.map_list[loc[0]][loc[1]] = tile_1
-                else:
-                    # map the first tile on the best point
-                    loc_1 = self.get_random_point(self.position_list)
-                    self.position_list[tile_1] = loc_1
-                    self.map_list[loc_1[0]][loc_1[1]] = tile_1
-                    # map the second tile on the nearest place
-                    loc_2 = self.get_nearest_pos(loc_1, self.map_list)
-                    self.position_list[tile_2] = loc_2
-                    self.map_list[loc_2[0]][loc_2[1]] = tile_2
-    # mutation
+        self.source = source
+        self.target = target
+        self.weight = weight
+        self.rng = np.random.default_rng(seed)
+        # row and column of each cell
+        self.cell_row, self.cell_column = np.divmod(
+            np.arange(self.tile_row * self.tile_column, dtype=np.int64), self.tile_column
+        )
+
+    def _place(self, cell, occupied, index, tile, anchor_tile):
+        """
+        place the tile on a random free cell for the individuals in index
+        if anchor_tile is not None, on a random nearest free cell to the anchor tile
+        """
+        free = ~occupied[index]
+        key = self.rng.random(free.shape, dtype=np.float32)
+        if anchor_tile is not None:
+            anchor_cell = cell[index, anchor_tile]
+            distance = np.abs(self.cell_row - self.cell_row[anchor_cell][:, None]) + \
+                np.abs(self.cell_column - self.cell_column[anchor_cell][:, None])
+            distance = np.where(free, distance, self.tile_row + self.tile_column)
+            free &= distance == distance.min(axis=1, keepdims=True)
+        loc = np.where(free, key, np.float32(-1.)).argmax(axis=1)
+        cell[index, tile] = loc
+        occupied[index, loc] = True
+
+    def random_mapping(self, position):
+        """
+        map the unmapped tiles in the order of the communication weight
+        the tile is mapped to the nearest free cell of the mapped one,
+        or a random free cell if both tiles are unmapped
+        """
+        individual_num = position.shape[0]
+        placed = position[:, :, 0] >= 0
+        cell = np.where(placed, position[:, :, 0] * self.tile_column + position[:, :, 1], -1)
+        occupied = np.zeros((individual_num, self.tile_row * self.tile_column), dtype=bool)
+        occupied[np.nonzero(placed)[0], cell[placed]] = True
+        for tile_1, tile_2 in zip(self.source.tolist(), self.target.tolist()):
+            placed_1 = cell[:, tile_1] >= 0
+            placed_2 = cell[:, tile_2] >= 0
+            index = np.flatnonzero(~placed_1 & ~placed_2)
+            if len(index) > 0:
+                self._place(cell, occupied, index, tile_1, None)
+                placed_1[index] = True
+            index = np.flatnonzero(placed_1 & ~placed_2)
+            if len(index) > 0:
+                self._place(cell, occupied, index, tile_2, tile_1)
+            index = np.flatnonzero(~placed_1 & placed_2)
+            if len(index) > 0:
+                self._place(cell, occupied, index, tile_1, tile_2)
+        # the tiles without communication
+        for tile in range(self.tile_num):
+            index = np.flatnonzero(cell[:, tile] < 0)
+            if len(index) > 0:
+                self._place(cell, occupied, index, tile, None)
+        return np.stack(np.divmod(cell, self.tile_column), axis=2)
+
+    def random_init(self, individual_num):
+        """
+        random init the population
+        """
+        return self.random_mapping(
+            np.full((individual_num, self.tile_num, 2), -1, dtype=np.int64)
+        )
+
+    def _get_cut_place(self, individual_num):
+        """
+        get the random tile segment [cut_place_1, cut_place_2] for each individual
+        """
+        cut_place_1 = self.rng.integers(0, self.tile_num - 1, individual_num)
+        cut_place_2 = self.rng.integers(cut_place_1 + 1, self.tile_num)
+        return cut_place_1, cut_place_2
+
+    def _get_tile_order(self, parent, tile_order):
+        """
+        get the child with the tile i on the position of the tile tile_order[:, i]
+        """
+        return parent[np.arange(parent.shape[0])[:, None], tile_order]
+
     def mutation_exchange(self, parent):
-        pass
+        """
+        exchange the positions of two random tiles
+        """
+        individual_num = parent.shape[0]
+        tile_1, tile_2 = self._get_cut_place(individual_num)
+        tile_order = np.tile(np.arange(self.tile_num), (individual_num, 1))
+        tile_order[np.arange(individual_num), tile_1] = tile_2
+        tile_order[np.arange(individual_num), tile_2] = tile_1
+        return self._get_tile_order(parent, tile_order)
+
     def mutation_reverse(self, parent):
-        pass
+        """
+        reverse the positions of a random tile segment
+        """
+        cut_place_1, cut_place_2 = self._get_cut_place(parent.shape[0])
+        tile_index = np.arange(self.tile_num)
+        inside = (tile_index >= cut_place_1[:, None]) & (tile_index <= cut_place_2[:, None])
+        tile_order = np.where(inside, (cut_place_1 + cut_place_2)[:, None] - tile_index, tile_index)
+        return self._get_tile_order(parent, tile_order)
+
     def mutation_insert(self, parent):
-        pass
+        """
+        move the position of the segment end to the segment start, and shift the others
+        """
+        cut_place_1, cut_place_2 = self._get_cut_place(parent.shape[0])
+        tile_index = np.arange(self.tile_num)
+        tile_order = np.where(
+            (tile_index > cut_place_1[:, None]) & (tile_index <= cut_place_2[:, None]),
+            tile_index - 1, tile_index
+        )
+        tile_order = np.where(tile_index == cut_place_1[:, None], cut_place_2[:, None], tile_order)
+        return self._get_tile_order(parent, tile_order)
+
     def mutation_remap(self, parent):
-        self.map_list = copy.deepcopy(parent.map_list)
-        self.position_list = copy.deepcopy(parent.position_list)
-        cut_place_1 = random.randint(0,self.tile_num-2)
-        cut_place_2 = random.randint(cut_place_1+1,self.tile_num-1)
-        if random.random() < 0.5:
-            for tile_id in range(cut_place_1,cut_place_2+1):
-                loc = self.position_list[tile_id]
-                self.map_list[loc[0]][loc[1]] = -1
-                self.position_list[tile_id] = None
-        else:
-            for tile_id in range(0,cut_place_1):
-                loc = self.position_list[tile_id]
-                self.map_list[loc[0]][loc[1]] = -1
-                self.position_list[tile_id] = None
-            for tile_id in range(cut_place_2+1,self.tile_num):
-                loc = self.position_list[tile_id]
-                self.map_list[loc[0]][loc[1]] = -1
-                self.position_list[tile_id] = None
-        self.random_mapping()
-    # crossover
-    def crossover(self, parent1, parent2):
-        pass
-    # update total comm
-    def update_total_comm(self):
-        total_comm = 0
-        for link in self.rank_list:
-            tile_1 = link[0][0]
-            tile_2 = link[0][1]
-            pos_1 = self.position_list[tile_1]
-            pos_2 = self.position_list[tile_2]
-            comm = link[1]
-            total_comm += comm * (abs(pos_1[0]-pos_2[0])+abs(pos_1[1]-pos_2[1]))
-        self.total_comm = total_comm
+        """
+        unmap a random tile segment, or the tiles outside it, and remap them
+        """
+        individual_num = parent.shape[0]
+        cut_place_1, cut_place_2 = self._get_cut_place(individual_num)
+        tile_index = np.arange(self.tile_num)
+        inside = (tile_index >= cut_place_1[:, None]) & (tile_index <= cut_place_2[:, None])
+        remove = np.where(self.rng.random(individual_num)[:, None] < 0.5, inside, ~inside)
+        child = parent.copy()
+        child[remove] = -1
+        return self.random_mapping(child)
+
+    def mutation(self, parent, mutation_probability):
+        """
+        mutate each individual with the probability, by one random mutation
+        """
+        child = parent.copy()
+        if self.tile_num < 2:
+            return child
+        mutation_type = np.where(
+            self.rng.random(parent.shape[0]) < mutation_probability,
+            self.rng.integers(0, 4, parent.shape[0]), -1
+        )
+        for i, mutation_func in enumerate([
+            self.mutation_exchange, self.mutation_reverse,
+            self.mutation_insert, self.mutation_remap
+        ]):
+            index = np.flatnonzero(mutation_type == i)
+            if len(index) > 0:
+                child[index] = mutation_func(parent[index])
+        return child
+
+    def crossover(self, parent_1, parent_2, crossover_probability):
+        """
+        keep the positions of a random tile segment from the parent 1,
+        the other tiles take the positions from the parent 2 if the cell is free,
+        and the rest are remapped
+        """
+        individual_num = parent_1.shape[0]
+        if self.tile_num < 2:
+            return parent_1.copy()
+        cut_place_1, cut_place_2 = self._get_cut_place(individual_num)
+        tile_index = np.arange(self.tile_num)
+        inside = (tile_index >= cut_place_1[:, None]) & (tile_index <= cut_place_2[:, None])
+        # no crossover, the whole parent 1
+        inside[self.rng.random(individual_num) >= crossover_probability] = True
+        cell_1 = parent_1[:, :, 0] * self.tile_column + parent_1[:, :, 1]
+        cell_2 = parent_2[:, :, 0] * self.tile_column + parent_2[:, :, 1]
+        occupied = np.zeros((individual_num, self.tile_row * self.tile_column), dtype=bool)
+        occupied[np.nonzero(inside)[0], cell_1[inside]] = True
+        conflict = occupied[np.arange(individual_num)[:, None], cell_2]
+        child = np.where(inside[:, :, None], parent_1, parent_2)
+        child[~inside & conflict] = -1
+        return self.random_mapping(child)
+
+    def get_total_comm(self, position):
+        """
+        get the total communication, sum of weight x hops, for all individuals
+        """
+        hops = np.abs(position[:, self.source] - position[:, self.target]).sum(axis=2)
+        return hops @ self.weight
+
+    def get_max_link_load(self, position):
+        """
+        get the max link load on the XY routing, for all individuals
+        the load is accumulated on the difference arrays along the row and the column
+        """
+        individual_num = position.shape[0]
+        row, column = self.tile_row, self.tile_column
+        source_row, source_column = position[:, self.source, 0], position[:, self.source, 1]
+        target_row, target_column = position[:, self.target, 0], position[:, self.target, 1]
+        individual = np.arange(individual_num)[:, None] * (row * column)
+        weight = np.broadcast_to(self.weight, source_row.shape).ravel()
+        # first left or right, on the source row
+        source_row_start = individual + source_row * column
+        horizontal = np.bincount(
+            np.concatenate([
+                (source_row_start + np.minimum(source_column, target_column)).ravel(),
+                (source_row_start + np.maximum(source_column, target_column)).ravel()
+            ]),
+            np.concatenate([weight, -weight]), minlength=individual_num * row * column
+        ).reshape(individual_num, row, column).cumsum(axis=2)[:, :, :-1]
+        # then up or down, on the target column
+        vertical = np.bincount(
+            np.concatenate([
+                (individual + target_column * row + np.minimum(source_row, target_row)).ravel(),
+                (individual + target_column * row + np.maximum(source_row, target_row)).ravel()
+            ]),
+            np.concatenate([weight, -weight]), minlength=individual_num * row * column
+        ).reshape(individual_num, column, row).cumsum(axis=2)[:, :, :-1]
+        return np.maximum(
+            horizontal.reshape(individual_num, -1).max(axis=1, initial=0.),
+            vertical.reshape(individual_num, -1).max(axis=1, initial=0.)
+        )
+
+    def get_latency(self, position):
+        """
+        get the latency proxy, the max weight x hops of one communication, for all individuals
+        """
+        hops = np.abs(position[:, self.source] - position[:, self.target]).sum(axis=2)
+        return (hops * self.weight).max(axis=1, initial=0.)
+
+    def get_objective(self, position):
+        """
+        get the objectives to minimize, (N, 3) array
+        total communication, max link load and latency proxy
+        """
+        return np.stack([
+            self.get_total_comm(position),
+            self.get_max_link_load(position),
+            self.get_latency(position),
+        ], axis=1)
+
+def get_non_dominated_rank(objective):
+    """
+    fast non-dominated sorting, the front rank of each individual, 0 for the pareto front
+    """
+    dominate = (objective[:, None, :] <= objective[None, :, :]).all(axis=2) & \
+        (objective[:, None, :] < objective[None, :, :]).any(axis=2)
+    dominated_count = dominate.sum(axis=0)
+    rank = np.full(objective.shape[0], -1, dtype=np.int64)
+    current_rank = 0
+    while (rank < 0).any():
+        front = (dominated_count == 0) & (rank < 0)
+        rank[front] = current_rank
+        dominated_count = dominated_count - dominate[front].sum(axis=0)
+        current_rank += 1
+    return rank
+
+def get_crowding_distance(objective, rank):
+    """
+    crowding distance of each individual in its front
+    the boundary individuals on each objective are inf, the interior ones are 0
+    on the objective with the same value
+    """
+    distance = np.zeros(objective.shape[0], dtype=np.float64)
+    for front_rank in range(rank.max() + 1):
+        front = np.flatnonzero(rank == front_rank)
+        for value in objective[front].T:
+            order = np.argsort(value, kind="stable")
+            sort_value = value[order]
+            value_range = sort_value[-1] - sort_value[0]
+            front_distance = np.full(len(front), np.inf)
+            if len(front) > 2:
+                front_distance[1:-1] = (sort_value[2:] - sort_value[:-2]) / value_range \
+                    if value_range > 0 else 0.
+            distance[front[order]] += front_distance
+    return distance
+
+OBJECTIVE_NAME_LIST = ["total_comm", "max_link_load", "latency"]
+
+def _get_child(population_args, parent_1, parent_2, probability, seed):
+    """
+    get the child and the objectives, for the process pool
+    """
+    population = MappingPopulation(*population_args, seed=seed)
+    child = population.crossover(parent_1, parent_2, probability[0])
+    child = population.mutation(child, probability[1])
+    return child, population.get_objective(child)
 
 class NSGA_II(Mapping):
     """
     NSGA_II Mapping algorithm
+    minimize the total communication, the max link load and the latency proxy
+    the mapping config keys: population_size, generation_num, crossover_probability,
+    mutation_probability, worker_num, seed and objective to choose from the pareto front
+    the pareto front keeps one mapping for each objective vector
     """
     NAME = "nsga2"
+    def _get_child(self, population, parent_1, parent_2, probability, executor, worker_num):
+        """
+        get the child by crossover and mutation, and the objectives
+        split the parents into chunks for the process pool
+        """
+        if executor is None:
+            child = population.crossover(parent_1, parent_2, probability[0])
+            child = population.mutation(child, probability[1])
+            return child, population.get_objective(child)
+        population_args = (
+            (population.tile_row, population.tile_column), population.tile_num,
+            population.source, population.target, population.weight
+        )
+        future_list = [
+            executor.submit(_get_child, population_args, parent_chunk_1, parent_chunk_2,
+                probability, int(population.rng.integers(2**32)))
+            for parent_chunk_1, parent_chunk_2 in zip(
+                np.array_split(parent_1, worker_num), np.array_split(parent_2, worker_num)
+            ) if len(parent_chunk_1) > 0
+        ]
+        result_list = [future.result() for future in future_list]
+        return np.concatenate([result[0] for result in result_list]), \
+            np.concatenate([result[1] for result in result_list])
+
+    def _tournament(self, population, rank, distance, select_num):
+        """
+        binary tournament, lower rank first, then larger crowding distance
+        """
+        candidate = population.rng.integers(0, len(rank), (2, select_num))
+        better = (rank[candidate[0]] < rank[candidate[1]]) | (
+            (rank[candidate[0]] == rank[candidate[1]]) & \
+            (distance[candidate[0]] >= distance[candidate[1]])
+        )
+        return np.where(better, candidate[0], candidate[1])
+
     def _get_position_list(self, tile_behavior_list):
         # rank the transferred data amount between tiles
-        data_dict = dict()
-        data_matrix = [[0]*len(tile_behavior_list) for _ in range(0,len(tile_behavior_list))]
-        for tile_behavior in tile_behavior_list:
-            tile_id = tile_behavior["tile_id"]
-            target_tile_list = tile_behavior["target_tile_id"]
-            transfer_list = tile_behavior["dependence"]
-            transfer_amount = 0
-            for data in transfer_list:
-                outputs = data["output"]
-                for output in outputs:
-                    transfer_amount += (output[3] - output[2]) * output[4]
-            for target_tile_id in target_tile_list:
-                if target_tile_id >= 0:
-                    data_dict[(tile_id,target_tile_id)] = transfer_amount
-                    data_matrix[tile_id][target_tile_id] = transfer_amount
-        # info for mapping
-        rank_list = sorted(data_dict.items(),key=lambda s:s[1],reverse=True)    #[((tile_id,target_tile_id),transfer_amount)]
+        source, target, weight = get_communication_weight(tile_behavior_list)
         tile_num = len(tile_behavior_list)
+        assert tile_num <= self.tile_row * self.tile_column, \
+            "the tile number should not be larger than the tile net size"
         # 0.parameters
-        N = 200
-        maxGEN = 200
-        # crossover_probability = 0.9
-        mutation_probability = 0.7
+        choose_objective = self.mapping_config.get("objective", "total_comm")
+        if choose_objective not in OBJECTIVE_NAME_LIST:
+            raise ValueError(
+                f"unknown objective {choose_objective}, should be in {OBJECTIVE_NAME_LIST}"
+            )
+        N = self.mapping_config.get("population_size", 200)
+        maxGEN = self.mapping_config.get("generation_num", 200)
+        probability = (
+            self.mapping_config.get("crossover_probability", 0.9),
+            self.mapping_config.get("mutation_probability", 0.7),
+        )
+        worker_num = self.mapping_config.get("worker_num", 0)
+        population = MappingPopulation(
+            (self.tile_row, self.tile_column), tile_num, source, target, weight,
+            seed=self.mapping_config.get("seed", None)
+        )
         # 1.random initialize
-        population = []
-        for i in range(0,N):
-            individual = Individual(self.tile_row,self.tile_column,tile_num,rank_list)
-            individual.random_mapping()
-            individual.update_total_comm()
-            population.append(individual)
-        # 2.first generation child
-        # 2.1 tournament
-        # 2.2 crossover/mutation
-        # 3.repeated evolution
-        for i in range(0,maxGEN):
-            child=[]
-            for individual in population:
-                # if mutation happens
-                if random.random() < mutation_probability:
-                    new_child = Individual(self.tile_row,self.tile_column,tile_num,rank_list)
-                    new_child.mutation_remap(individual)
-                    new_child.update_total_comm()
-                    child.append(new_child)
-            elete = sorted(population+child,key=lambda s:s.total_comm)
-            population = elete[:N]
-            min_comm = population[0].total_comm
-            # print('min comm:'+str(population[0].total_comm))
-        # 3.1 tournament
-        # 3.2 crossover/mutation
-        # 3.3 elete choice
-        # 4 choose the best mapping result
-        position_list = population[0].position_list
-        self.logger.info('final min comm:'+str(population[0].total_comm))
-        # return list
-        return position_list
\ No newline at end of file
+        position = population.random_init(N)
+        objective = population.get_objective(position)
+        rank = get_non_dominated_rank(objective)
+        distance = get_crowding_distance(objective, rank)
+        # 2.repeated evolution
+        executor = None
+        if worker_num > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(worker_num)
+        try:
+            for _ in range(maxGEN):
+                # 2.1 tournament
+                parent_index = self._tournament(population, rank, distance, 2 * N)
+                # 2.2 crossover/mutation
+                child, child_objective = self._get_child(
+                    population, position[parent_index[:N]], position[parent_index[N:]],
+                    probability, executor, worker_num
+                )
+                # 2.3 elete choice, by the front rank and the crowding distance
+                position = np.concatenate([position, child])
+                objective = np.concatenate([objective, child_objective])
+                rank = get_non_dominated_rank(objective)
+                distance = get_crowding_distance(objective, rank)
+                elete = np.lexsort((-distance, rank))[:N]
+                position, objective = position[elete], objective[elete]
+                rank, distance = rank[elete], distance[elete]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        # 3 the pareto front, one mapping for each objective vector
+        _, front_index = np.unique(objective[rank == 0], axis=0, return_index=True)
+        front_index = np.flatnonzero(rank == 0)[np.sort(front_index)]
+        self.population_position = position
+        self.pareto_front = []
+        for i in front_index.tolist():
+            front = dict(zip(OBJECTIVE_NAME_LIST, objective[i].tolist()))
+            front["position_list"] = [tuple(pos) for pos in position[i].tolist()]
+            self.pareto_front.append(front)
+        # 4 choose the best mapping result on the objective
+        best = min(self.pareto_front, key=lambda s: s[choose_objective])
+        self.logger.info(
+            f"pareto front has {len(self.pareto_front)} mappings, " + \
+            f"choose on {choose_objective}: " + \
+            ", ".join(f"{name} {best[name]}" for name in OBJECTIVE_NAME_LIST)
+        )
+        return best["position_list"]
+
+def _get_simulation_time(task_behavior_list, array_config):
+    """
+    simulate the mapping, return the time when all tasks finish, for the process pool
+    """
+    from mnsim_noc.Array import BaseArray
+    array = BaseArray.from_config(task_behavior_list, array_config)
+    array.run()
+    return max(result["total_time"] for result in array.get_latency_throughput().values())
+
+class SurrogateMapping(Mapping):
+    """
+    surrogate mapping, simulation in the loop
+    the candidates are the nsga2 population and the heuristic mappings,
+    ranked by the surrogate time, and only the top candidates are simulated
+    the mapping config keys: the same as nsga2, and simulation_num
+    the candidates are simulated with the array config of the array, in statistics mode
+    """
+    NAME = "surrogate"
+    HEURISTIC_MAPPING_LIST = ["naive", "snake", "commwise"]
+    def _get_candidate_list(self, tile_behavior_list):
+        """
+        get the candidate position array, (K, tile_num, 2)
+        """
+        nsga = NSGA_II(
+            self.task_behavior_list, self.image_num, (self.tile_row, self.tile_column),
+            self.buffer_size, self.band_width, self.mapping_config
+        )
+        nsga._get_position_list(tile_behavior_list)
+        candidate_list = [nsga.population_position]
+        for mapping_strategy in self.HEURISTIC_MAPPING_LIST:
+            mapping = Mapping.get_class_(mapping_strategy)(
+                self.task_behavior_list, self.image_num, (self.tile_row, self.tile_column),
+                self.buffer_size, self.band_width
+            )
+            try:
+                position_list = mapping._get_position_list(tile_behavior_list)
+                self._check_position_list(position_list, tile_behavior_list)
+            except AssertionError:
+                # the heuristic mapping can not map all tiles on this tile net shape
+                continue
+            candidate_list.append(np.array([position_list], dtype=np.int64))
+        # without the duplicated mapping
+        candidate = np.concatenate(candidate_list)
+        _, candidate_index = np.unique(
+            candidate.reshape(candidate.shape[0], -1), axis=0, return_index=True
+        )
+        return candidate[np.sort(candidate_index)]
+
+    def get_surrogate_time(self, tile_behavior_list, position):
+        """
+        get the surrogate time for all candidates,
+        pipeline latency of one image plus the bottleneck period for the other images
+        the latency is the critical path of computation and XY transfer,
+        the period is the max of the tile computation, the communication and the link load
+        """
+        source, target, weight = get_communication_weight(tile_behavior_list)
+        population = MappingPopulation(
+            (self.tile_row, self.tile_column), len(tile_behavior_list), source, target, weight
+        )
+        computation = np.array([
+            sum(dependence["latency"] for dependence in tile_behavior["dependence"])
+            for tile_behavior in tile_behavior_list
+        ], dtype=np.float64)
+        hops = np.abs(position[:, source] - position[:, target]).sum(axis=2)
+        transfer = hops * weight / self.band_width
+        period = np.maximum(
+            computation.max(initial=0.),
+            np.maximum(
+                transfer.max(axis=1, initial=0.),
+                population.get_max_link_load(position) / self.band_width
+            )
+        )
+        # critical path, in the topological order of the tiles
+        in_link = [[] for _ in tile_behavior_list]
+        out_degree = np.zeros(len(tile_behavior_list), dtype=np.int64)
+        in_degree = np.zeros(len(tile_behavior_list), dtype=np.int64)
+        for i, (tile_1, tile_2) in enumerate(zip(source.tolist(), target.tolist())):
+            in_link[tile_2].append(i)
+            out_degree[tile_1] += 1
+            in_degree[tile_2] += 1
+        finish = np.zeros((position.shape[0], len(tile_behavior_list)), dtype=np.float64)
+        tile_queue = np.flatnonzero(in_degree == 0).tolist()
+        while len(tile_queue) > 0:
+            tile = tile_queue.pop()
+            start = 0.
+            if len(in_link[tile]) > 0:
+                start = (finish[:, source[in_link[tile]]] + transfer[:, in_link[tile]]).max(axis=1)
+            finish[:, tile] = start + computation[tile]
+            for i in np.flatnonzero(source == tile).tolist():
+                in_degree[target[i]] -= 1
+                if in_degree[target[i]] == 0:
+                    tile_queue.append(target[i])
+        return finish.max(axis=1, initial=0.) + (self.image_num - 1) * period
+
+    def _get_position_list(self, tile_behavior_list):
+        candidate = self._get_candidate_list(tile_behavior_list)
+        surrogate_time = self.get_surrogate_time(tile_behavior_list, candidate)
+        simulation_num = self.mapping_config.get("simulation_num", 4)
+        top_index = np.argsort(surrogate_time, kind="stable")[:simulation_num].tolist()
+        # simulate the top candidates
+        array_config_list = []
+        for i in top_index:
+            array_config_list.append({
+                **self.array_config,
+                "image_num": self.image_num,
+                "tile_array_row": self.tile_row,
+                "tile_array_col": self.tile_column,
+                "input_buffer_size": self.buffer_size[0],
+                "output_buffer_size": self.buffer_size[1],
+                "band_width": self.band_width,
+                "mapping_strategy": "given",
+                "mapping_config": {
+                    "position_list": [tuple(pos) for pos in candidate[i].tolist()]
+                },
+                "statistics_flag": True,
+            })
+        worker_num = self.mapping_config.get("worker_num", 0)
+        if worker_num > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(worker_num) as executor:
+                simulation_time = list(executor.map(
+                    _get_simulation_time,
+                    [self.task_behavior_list] * len(array_config_list), array_config_list
+                ))
+        else:
+            simulation_time = [
+                _get_simulation_time(self.task_behavior_list, array_config)
+                for array_config in array_config_list
+            ]
+        self.candidate_result = [
+            {
+                "position_list": array_config["mapping_config"]["position_list"],
+                "surrogate_time": float(surrogate_time[i]),
+                "simulation_time": simulation_time[j],
+            }
+            for j, (i, array_config) in enumerate(zip(top_index, array_config_list))
+        ]
+        best = min(self.candidate_result, key=lambda s: s["simulation_time"])
+        self.logger.info(
+            f"simulate {len(self.candidate_result)} of {len(candidate)} candidates, " + \
+            f"surrogate time {best['surrogate_time']}, simulation time {best['simulation_time']}"
+        )
+        return best["position_list"]
@@ -10,110 +10,444 @@
     2022/05/07 21:20
 """
 import abc
+import numpy as np
 from mnsim_noc.utils.component import Component
-from mnsim_noc.Wire.wire_net import _get_map_key
+from mnsim_noc.Buffer.base_buffer import get_data_size
+from mnsim_noc.Communication import MulticastCommunication
 
 class Schedule(Component):
     """
     schedule class for behavior-driven simulation
     """
     REGISTRY = "schedule"
+    # packet mode of the wire net, only for the packet schedule
+    PACKET_MODE = False
     def __init__(self, communication_list, wire_net):
         super(Schedule, self).__init__()
         self.communication_list = communication_list
         self.wire_net = wire_net
-        self.all_wire_state = {}
+        if self.PACKET_MODE:
+            if not self.wire_net.packet_mode:
+                self.wire_net.set_packet_mode()
+        else:
+            assert not self.wire_net.packet_mode, \
+                f"the packet mode is not supported in the {self.NAME} schedule"
+        # route for each communication, from the route table
+        self.route_list = [
+            self._get_route(communication) for communication in self.communication_list
+        ]
+        # route matrix, communication x wire, built on demand
+        self.route_matrix = None
+        # dirty communication, None for checking all communications
+        self.dirty_communication = None
+        # wire index -> the ready communications blocked by this wire
+        self.waiting_communication = None
+
+    def _get_route(self, communication):
+        """
+        get the route of the communication, the tree route for the multicast
+        """
+        if isinstance(communication, MulticastCommunication):
+            return self.wire_net.get_tree_route(
+                communication.input_tile.position,
+                [output_tile.position for output_tile in communication.output_tile_list]
+            )
+        return self.wire_net.get_route(
+            communication.input_tile.position, communication.output_tile.position
+        )
 
     @abc.abstractmethod
-    def _get_transfer_path_list(self, communication_ready_flag):
+    def _get_transfer_path_list(self, ready_communication_list):
         """
         get transfer path list, and transfer time list
+        ready_communication_list is the index list of the ready communications
         """
         raise NotImplementedError
 
+    def _get_data_size(self, i):
+        """
+        get the transfer data size of the i-th communication
+        """
+        return sum([
+            get_data_size(data) for data in self.communication_list[i].transfer_data
+        ])
+
+    def _get_transfer_time(self, i, route):
+        """
+        get the transfer time of the i-th communication on the route
+        """
+        return route.get_transfer_time(self._get_data_size(i))
+
+    def _get_route_matrix(self):
+        """
+        get the route matrix, route_matrix[i, j] is True if i-th route uses j-th wire
+        """
+        if self.route_matrix is None:
+            self.route_matrix = np.zeros(
+                (len(self.communication_list), len(self.wire_net.wire_position_list)),
+                dtype=bool
+            )
+            for i, route in enumerate(self.route_list):
+                self.route_matrix[i, route.wire_index] = True
+        return self.route_matrix
+
+    def _get_greedy_allocation(self, communication_order):
+        """
+        greedy first-come allocation of the routes, vectorized
+        communication_order: index array of the ready communications, first come first
+        return the granted flag array in the same order
+        the result is the same as granting one by one when all wires are idle
+        """
+        communication_num = len(communication_order)
+        if self.wire_net.transparent_flag:
+            return np.ones(communication_num, dtype=bool)
+        route_matrix = self._get_route_matrix()[communication_order]
+        # the candidates, not blocked by the busy wires
+        busy_index = np.flatnonzero(self.wire_net.wire_state)
+        granted = ~route_matrix[:, busy_index].any(axis=1)
+        candidate_index = np.flatnonzero(granted)
+        if len(candidate_index) <= 1:
+            return granted
+        # conflict[i, j] is True if the candidate i and the earlier candidate j share one wire
+        candidate_matrix = route_matrix[candidate_index]
+        candidate_matrix = candidate_matrix[:, candidate_matrix.any(axis=0)].astype(np.float32)
+        conflict = np.tril(candidate_matrix @ candidate_matrix.T > 0, -1)
+        # resolve in rounds, grant the candidates with no undecided or granted earlier conflict
+        # and drop the candidates with the granted earlier conflict
+        undecided = np.ones(len(candidate_index), dtype=bool)
+        candidate_granted = np.zeros(len(candidate_index), dtype=bool)
+        while undecided.any():
+            grant = undecided & ~(conflict & (undecided | candidate_granted)).any(axis=1)
+            candidate_granted |= grant
+            undecided &= ~grant
+            undecided &= ~(conflict & candidate_granted).any(axis=1)
+        granted[candidate_index] = candidate_granted
+        return granted
+
+    def set_dirty_communication(self):
+        """
+        only check the dirty communications in the schedule
+        the communication is marked dirty by the wake up of itself and the buffers
+        """
+        self.dirty_communication = set(range(len(self.communication_list)))
+        for i, communication in enumerate(self.communication_list):
+            for wake_up in communication.get_wake_up_list():
+                wake_up.add(self.dirty_communication, i)
+        # the ready communication blocked by the wire is woken by the release of the wire
+        self.waiting_communication = {}
+        self.wire_net.set_released_wire()
+
+    def _get_waiting_wire_index(self, i):
+        """
+        get the wire index array the blocked i-th communication can wait on
+        """
+        return self.route_list[i].wire_index
+
+    def _add_waiting_communication(self, i):
+        """
+        the ready i-th communication is blocked, wait on the busy wires of the routes
+        """
+        wire_index = self._get_waiting_wire_index(i)
+        busy_wire_list = wire_index[self.wire_net.wire_state[wire_index]].tolist()
+        if len(busy_wire_list) == 0:
+            # no busy wire to wait on, check in the next time
+            self.dirty_communication.add(i)
+        for wire_id in busy_wire_list:
+            self.waiting_communication.setdefault(wire_id, set()).add(i)
+
+    def wake_up_waiting_communication(self):
+        """
+        mark the communications waiting on the released wires dirty
+        """
+        for wire_id in self.wire_net.pop_released_wire():
+            self.dirty_communication.update(self.waiting_communication.pop(wire_id, ()))
+
     def schedule(self, current_time):
         """
         schedule the communication
+        return the index list of the started communications
         """
-        # get communication flag
-        communication_ready_flag = [communication.check_communication_ready()
-            for communication in self.communication_list
-        ]
+        # get the communications to check
+        if self.dirty_communication is None:
+            check_communication_list = range(len(self.communication_list))
+        else:
+            self.wake_up_waiting_communication()
+            check_communication_list = sorted(self.dirty_communication)
+            self.dirty_communication.clear()
+        # get ready communication
+        ready_communication_list = []
+        for i in check_communication_list:
+            communication = self.communication_list[i]
+            if communication.check_communication_ready():
+                ready_communication_list.append(i)
+            else:
+                communication.set_communication_task(current_time, None, None)
         transfer_path_list, transfer_time_list = \
-            self._get_transfer_path_list(communication_ready_flag)
+            self._get_transfer_path_list(ready_communication_list)
         # set task
-        for transfer_path, transfer_time, communication in \
-            zip(transfer_path_list, transfer_time_list, self.communication_list):
-            communication.set_communication_task(current_time, transfer_path, transfer_time)
+        start_communication_list = []
+        blocked_communication_list = []
+        for i, transfer_path, transfer_time in \
+            zip(ready_communication_list, transfer_path_list, transfer_time_list):
+            self.communication_list[i].set_communication_task(
+                current_time, transfer_path, transfer_time
+            )
+            if transfer_path is not None:
+                start_communication_list.append(i)
+            else:
+                blocked_communication_list.append(i)
+        if self.dirty_communication is not None:
+            # ready but blocked by the wire, after all the started communications set the wires
+            for i in blocked_communication_list:
+                self._add_waiting_communication(i)
+        return start_communication_list
 
 class NaiveSchedule(Schedule):
     """
     naive schedule class for behavior-driven simulation
     """
     NAME = "naive"
-    def __init__(self, communication_list, wire_net):
+    def _get_transfer_path_list(self, ready_communication_list):
         """
-        initialize the schedule with cache
+        get transfer path list
         """
-        super(NaiveSchedule, self).__init__(communication_list, wire_net)
-        self.path_cache = {} # cache the communication path
+        # naive schedule, the ready communications in the index order
+        transfer_path_list = []
+        transfer_time_list = []
+        if len(ready_communication_list) == 0:
+            return transfer_path_list, transfer_time_list
+        granted = self._get_greedy_allocation(np.array(ready_communication_list))
+        for i, granted_flag in zip(ready_communication_list, granted.tolist()):
+            if granted_flag:
+                route = self.route_list[i]
+                transfer_path_list.append(route.wire_index)
+                transfer_time_list.append(self._get_transfer_time(i, route))
+            else:
+                transfer_path_list.append(None)
+                transfer_time_list.append(None)
+        return transfer_path_list, transfer_time_list
 
-    def _get_transfer_path_list(self, communication_ready_flag):
+class AdaptiveSchedule(Schedule):
+    """
+    adaptive schedule class, choose the route between XY and YX
+    the ready communications are granted in the index order,
+    each one on the least loaded idle route, the smallest busy time sum on the wires
+    the busy time is the historical load from the start of the run, not a window,
+    so the route is chosen to balance the total load of the wires
+    """
+    NAME = "adaptive"
+    PATH_NUM = 2
+    def __init__(self, communication_list, wire_net):
+        super(AdaptiveSchedule, self).__init__(communication_list, wire_net)
+        # candidate routes for each communication, the first one is the XY route
+        # only the tree route for the multicast
+        self.candidate_route_list = [
+            [route] if isinstance(communication, MulticastCommunication) else
+            self.wire_net.route_table.get_route_list(
+                communication.input_tile.position, communication.output_tile.position,
+                self.PATH_NUM
+            ) for communication, route in zip(self.communication_list, self.route_list)
+        ]
+
+    def _get_waiting_wire_index(self, i):
+        return np.concatenate([route.wire_index for route in self.candidate_route_list[i]])
+
+    def _get_transfer_path_list(self, ready_communication_list):
         """
         get transfer path list
         """
-        # naive schedule
         transfer_path_list = []
         transfer_time_list = []
-        # get used wire state
-        for i, ready_flag in enumerate(communication_ready_flag):
-            if ready_flag:
-                transfer_path, transfer_path_str = self._get_naive_path(i)
-                self.wire_net.get_all_wire_state(self.all_wire_state, transfer_path_str)
-        # judge
-        for i, ready_flag in enumerate(communication_ready_flag):
-            if ready_flag:
-                transfer_path, transfer_path_str = self._get_naive_path(i)
-                if not any([self.all_wire_state[key] for key in transfer_path_str]):
-                    # add transfer path to list
-                    transfer_path_list.append(transfer_path)
-                    # set transfer time
-                    transfer_time_list.append(
-                        self.wire_net.get_wire_transfer_time(
-                            transfer_path, self.communication_list[i].transfer_data
-                        )
-                    )
-                    # update all wire state
-                    for key in transfer_path_str:
-                        self.all_wire_state[key] = not self.wire_net.transparent_flag
-                    continue
-            transfer_path_list.append(None)
-            transfer_time_list.append(None)
+        wire_state = self.wire_net.wire_state.copy()
+        for i in ready_communication_list:
+            if self.wire_net.transparent_flag:
+                # no conflict, the XY route
+                route = self.route_list[i]
+            else:
+                route, route_load = None, float("inf")
+                for candidate_route in self.candidate_route_list[i]:
+                    if wire_state[candidate_route.wire_index].any():
+                        continue
+                    load = self.wire_net.wire_busy_time[candidate_route.wire_index].sum()
+                    if load < route_load:
+                        route, route_load = candidate_route, load
+            if route is None:
+                transfer_path_list.append(None)
+                transfer_time_list.append(None)
+                continue
+            wire_state[route.wire_index] = True
+            transfer_path_list.append(route.wire_index)
+            transfer_time_list.append(self._get_transfer_time(i, route))
         return transfer_path_list, transfer_time_list
 
-    def _get_naive_path(self, i):
-        """
-        get naive path
-        """
-        # use cache path
-        if str(i) in self.path_cache:
-            return self.path_cache[str(i)]
-        # ge path
-        start_position = self.communication_list[i].input_tile.position
-        end_position = self.communication_list[i].output_tile.position
-        assert start_position != end_position
-        current_position = [start_position[0], start_position[1]]
-        path = []
-        while True:
-            path.append(tuple(current_position))
-            # first left or right
-            if current_position[1] != end_position[1]:
-                current_position[1] += 1 if current_position[1] < end_position[1] else -1
-            elif current_position[0] != end_position[0]:
-                current_position[0] += 1 if current_position[0] < end_position[0] else -1
+class MinimalPathSchedule(AdaptiveSchedule):
+    """
+    minimal path schedule class, choose the route among at most PATH_NUM minimal paths
+    """
+    NAME = "minimal"
+    PATH_NUM = 16
+
+class PrioritySchedule(Schedule):
+    """
+    priority schedule class, the ready communications are granted in the priority order
+    lower priority value first, the index order for the same value
+    """
+    @abc.abstractmethod
+    def _get_priority(self, ready_communication_list):
+        """
+        get the priority array of the ready communications, lower first
+        """
+        raise NotImplementedError
+
+    def _get_transfer_path_list(self, ready_communication_list):
+        """
+        get transfer path list
+        """
+        transfer_path_list = []
+        transfer_time_list = []
+        if len(ready_communication_list) == 0:
+            return transfer_path_list, transfer_time_list
+        ready_communication = np.array(ready_communication_list)
+        order = np.argsort(self._get_priority(ready_communication_list), kind="stable")
+        # granted flag in the ready order
+        granted = np.empty(len(order), dtype=bool)
+        granted[order] = self._get_greedy_allocation(ready_communication[order])
+        for i, granted_flag in zip(ready_communication_list, granted.tolist()):
+            if granted_flag:
+                route = self.route_list[i]
+                transfer_path_list.append(route.wire_index)
+                transfer_time_list.append(self._get_transfer_time(i, route))
             else:
-                break
-        navie_path = [(path[i], path[i+1]) for i in range(len(path)-1)] # get wire
-        navie_path_str = [_get_map_key(path) for path in navie_path] # get map key
-        self.path_cache[str(i)] = (navie_path, navie_path_str) # cache path
-        return self.path_cache[str(i)]
+                transfer_path_list.append(None)
+                transfer_time_list.append(None)
+        return transfer_path_list, transfer_time_list
+
+class CriticalSchedule(PrioritySchedule):
+    """
+    critical schedule class, the communication to the tile with the longest remaining path first
+    the remaining path of the tile is the computation latency of one image on the tile
+    and the longest remaining path of the target tiles, static in the layer graph
+    it is not the slack, no deadline or schedule time is considered
+    """
+    NAME = "critical"
+    def __init__(self, communication_list, wire_net):
+        super(CriticalSchedule, self).__init__(communication_list, wire_net)
+        # tile graph in the communications
+        tile_dict = {}
+        target_dict = {}
+        for communication in self.communication_list:
+            for tile in [communication.input_tile] + communication.output_tile_list:
+                tile_dict[id(tile)] = tile
+                target_dict.setdefault(id(tile), [])
+            target_dict[id(communication.input_tile)].extend(
+                [id(output_tile) for output_tile in communication.output_tile_list]
+            )
+        remaining_path = self._get_remaining_path(tile_dict, target_dict)
+        self.communication_priority = np.array([
+            -max([
+                remaining_path[id(output_tile)] for output_tile in communication.output_tile_list
+            ]) for communication in self.communication_list
+        ], dtype=np.float64)
+
+    def _get_remaining_path(self, tile_dict, target_dict):
+        """
+        get the longest remaining path of each tile, in the reverse topological order
+        """
+        source_number = dict((key, 0) for key in tile_dict)
+        for target_list in target_dict.values():
+            for target in target_list:
+                source_number[target] += 1
+        topological_order = [key for key, number in source_number.items() if number == 0]
+        for key in topological_order:
+            for target in target_dict[key]:
+                source_number[target] -= 1
+                if source_number[target] == 0:
+                    topological_order.append(target)
+        assert len(topological_order) == len(tile_dict), "the layer graph should be acyclic"
+        remaining_path = {}
+        for key in reversed(topological_order):
+            latency = sum([dependence["latency"] for dependence in tile_dict[key].dependence_list])
+            remaining_path[key] = latency + max(
+                [remaining_path[target] for target in target_dict[key]], default=0
+            )
+        return remaining_path
+
+    def _get_priority(self, ready_communication_list):
+        return self.communication_priority[ready_communication_list]
+
+class StarvationSchedule(PrioritySchedule):
+    """
+    starvation schedule class, the communication to the starving input buffer first
+    the idle target tile first, then the less filled input buffer for this source
+    for the multicast, the most starving target
+    """
+    NAME = "starvation"
+    def _get_priority(self, ready_communication_list):
+        priority_list = []
+        for i in ready_communication_list:
+            communication = self.communication_list[i]
+            target_priority_list = []
+            for output_tile in communication.output_tile_list:
+                input_buffer = output_tile.input_buffer.input_buffer_dict[
+                    str(communication.source_tile_id)
+                ]
+                fill_rate = (input_buffer.used_space + input_buffer.transfer_data_size) / \
+                    input_buffer.buffer_size
+                target_priority_list.append(fill_rate + (1. if output_tile.running_state else 0.))
+            priority_list.append(min(target_priority_list))
+        return np.array(priority_list, dtype=np.float64)
+
+class AgeSchedule(PrioritySchedule):
+    """
+    age schedule class, the communication with the oldest image first
+    """
+    NAME = "age"
+    def _get_priority(self, ready_communication_list):
+        # x, y, start, end, bit, total, image_id, layer_id, in_id, tile_id
+        return np.array([
+            min([data[6] for data in self.communication_list[i].transfer_data])
+            for i in ready_communication_list
+        ], dtype=np.int64)
+
+class WormholeSchedule(Schedule):
+    """
+    wormhole schedule class, the packet mode of the wire net
+    the ready communications are granted in the index order on the XY route,
+    when there is a free virtual channel on each wire,
+    and the packets are reserved on the wires, pipelined across the hops
+    """
+    NAME = "wormhole"
+    PACKET_MODE = True
+    def __init__(self, communication_list, wire_net):
+        super(WormholeSchedule, self).__init__(communication_list, wire_net)
+        assert not any([
+            isinstance(communication, MulticastCommunication)
+            for communication in self.communication_list
+        ]), "the multicast communication is not supported in the wormhole schedule"
+        self.current_time = 0.
+
+    def schedule(self, current_time):
+        # the reservation starts at the current time
+        self.current_time = current_time
+        return super(WormholeSchedule, self).schedule(current_time)
+
+    def _get_transfer_path_list(self, ready_communication_list):
+        """
+        get transfer path list
+        """
+        transfer_path_list = []
+        transfer_time_list = []
+        wire_vc_number = self.wire_net.wire_vc_number.copy()
+        for i in ready_communication_list:
+            route = self.route_list[i]
+            if not self.wire_net.transparent_flag and \
+                (wire_vc_number[route.wire_index] >= self.wire_net.vc_num).any():
+                transfer_path_list.append(None)
+                transfer_time_list.append(None)
+                continue
+            wire_vc_number[route.wire_index] += 1
+            transfer_path_list.append(route.wire_index)
+            transfer_time_list.append(self.wire_net.reserve_packet_path(
+                route.wire_index, self._get_data_size(i), self.current_time
+            ))
+        return transfer_path_list, transfer_time_list
@@ -7,9 +7,10 @@
 @CreateTime:
     2021/10/08 17:57
 """
-import copy
 from mnsim_noc.utils.component import Component
-from mnsim_noc.Buffer import MultiInputBuffer, MultiOutputBuffer
+from mnsim_noc.utils.wake_up import WakeUp
+from mnsim_noc.utils.statistics import RangeStatistics
+from mnsim_noc.Buffer import MultiInputBuffer, MultiOutputBuffer, get_data_block
 
 class BaseTile(Component):
     """
@@ -31,7 +32,8 @@ class BaseTile(Component):
         # position and tile_behavior_cfg
         self.position = position
         self.image_num = image_num
-        self.tile_behavior_cfg = copy.deepcopy(tile_behavior_cfg)
+        # the config is only read, no copy, it can be the view of the compiled workload
+        self.tile_behavior_cfg = tile_behavior_cfg
         # other parameters
         self.task_id = tile_behavior_cfg["task_id"] # value
         self.tile_id = tile_behavior_cfg["tile_id"] # value
@@ -43,29 +45,52 @@ class BaseTile(Component):
         self.output_buffer = MultiOutputBuffer(buffer_size[1], self.target_tile_id)
         # running state, False for idle, True for running
         self.running_state = False
-        self.computation_list = self._get_computation_list()
+        self.dependence_list = self.tile_behavior_cfg["dependence"]
+        self.dependence_length = len(self.dependence_list)
+        self.computation_number = self.image_num * self.dependence_length
+        self.computation = None
         self.computation_id = 0
         self.computation_end_time = float("inf")
         self.computation_range_time = []
+        # running statistics, the range list is not kept in the statistics mode
+        self.statistics_flag = False
+        self.computation_statistics = RangeStatistics()
+        self.image_range_time = [[float("inf"), float("-inf")] for _ in range(self.image_num)]
+        # wake up when the running state changes
+        self.state_wake_up = WakeUp()
+        # trace sink for the computation events
+        self.trace_sink = None
 
-    def _get_computation_list(self):
+    def _get_computation(self, computation_id):
         """
-        get the computation list
-        each item is a tuple, (dependence, done_flag)
-        done_flag, idle, running, done
+        get the computation on demand, only the current computation is kept
+        the dependence is modified base on the image id
         """
-        computation_list = []
-        dependence_length = len(self.tile_behavior_cfg["dependence"])
-        for i in range(self.image_num):
-            for j in range(dependence_length):
-                dependence = copy.deepcopy(self.tile_behavior_cfg["dependence"][j])
-                # modify dependence base on image num
-                for key in ["wait", "output", "drop"]:
-                    for value in dependence[key]:
-                        # x, y, start, end, bit, total, image_id, layer_id, tile_id
-                        value[6] = i
-                computation_list.append([dependence, "idle"])
-        return computation_list
+        image_id = computation_id // self.dependence_length
+        dependence = self.dependence_list[computation_id % self.dependence_length]
+        computation = dict(
+            (key, dependence[key]) for key in dependence.keys()
+            if key not in ("wait", "output", "drop")
+        )
+        for key in ["wait", "output", "drop"]:
+            # x, y, start, end, bit, total, image_id, layer_id, in_id, tile_id
+            computation[key] = [
+                get_data_block((*value[:6], image_id, *value[7:])) for value in dependence[key]
+            ]
+        return computation
+
+    def set_statistics_flag(self, statistics_flag):
+        """
+        set the statistics flag, True for no range list
+        """
+        self.statistics_flag = statistics_flag
+
+    def set_trace_sink(self, trace_sink):
+        """
+        set the trace sink, None for no trace
+        """
+        self.trace_sink = trace_sink
+        self.trace_name = f"{self.task_id},{self.tile_id} {self.position}"
 
     def update(self, current_time):
         """
@@ -77,23 +102,26 @@ class BaseTile(Component):
         if self.running_state:
             if current_time >= self.computation_end_time:
                 # PHASE: Tile COMPUTATION DONE
-                # get computation
-                computation = self.computation_list[self.computation_id][0]
+                # get computation, and drop it
+                computation = self.computation
                 # modify state
                 self.running_state = False
-                self.computation_list[self.computation_id][1] = "done"
+                self.computation = None
                 self.computation_id += 1
                 # modify buffer
                 self.input_buffer.delete_data_list(computation["drop"])
                 self.output_buffer.add_data_list(computation["output"])
+                self.state_wake_up()
             else:
                 return None
         assert self.running_state == False, "running_state should be idle"
-        if self.computation_id >= len(self.computation_list):
+        if self.computation_id >= self.computation_number:
             # if all computation are done, return None
             self.computation_end_time = float("inf")
             return None
-        computation = self.computation_list[self.computation_id][0]
+        if self.computation is None:
+            self.computation = self._get_computation(self.computation_id)
+        computation = self.computation
         # for idle state, running state is False
         # check if the computation can run
         # PHASE: TILE COMPUTATION JUDGE
@@ -101,10 +129,21 @@ class BaseTile(Component):
             and self.output_buffer.check_enough_space(computation["output"]):
             # PHASE: TILE COMPUTATION START
             self.running_state = True
-            self.computation_list[self.computation_id][1] = "running"
             assert computation["latency"] > 0, "latency should be positive"
             self.computation_end_time = current_time + computation["latency"]
-            self.computation_range_time.append((current_time, self.computation_end_time))
+            if not self.statistics_flag:
+                self.computation_range_time.append((current_time, self.computation_end_time))
+            self.computation_statistics.add(current_time, self.computation_end_time)
+            # the computations are in order, first start and last end of the image
+            image_range = self.image_range_time[self.computation_id // self.dependence_length]
+            if self.computation_id % self.dependence_length == 0:
+                image_range[0] = current_time
+            image_range[1] = self.computation_end_time
+            if self.trace_sink is not None:
+                self.trace_sink.add_event(
+                    "tile", self.trace_name, current_time, self.computation_end_time
+                )
+            self.state_wake_up()
             return None
         else:
             self.computation_end_time = float("inf")
@@ -122,20 +161,29 @@ class BaseTile(Component):
         """
         get the range of the computation
         """
+        assert not self.statistics_flag, \
+            "the range list is not kept in the statistics mode, use computation_statistics"
         computation_range = []
-        dependence_length = len(self.tile_behavior_cfg["dependence"])
         for i in range(self.image_num):
             computation_range.append([])
-            for j in range(dependence_length):
-                computation_range[-1].append(self.computation_range_time[i*dependence_length+j])
+            for j in range(self.dependence_length):
+                computation_range[-1].append(
+                    self.computation_range_time[i*self.dependence_length+j]
+                )
         return computation_range
 
+    def get_image_range(self):
+        """
+        get the first start and the last end of the computation on each image
+        """
+        return [tuple(image_range) for image_range in self.image_range_time]
+
     def check_finish(self):
         """
         check if the tile is finished
         """
         assert self.running_state == False, f"{self.tile_id} running_state should be idle"
-        assert self.computation_id == len(self.computation_list), \
+        assert self.computation_id == self.computation_number, \
             f"{self.tile_id} computation_id should to the end of the list"
         assert self.computation_end_time == float("inf"), \
             f"{self.tile_id} computation_end_time should be inf"
@@ -147,8 +195,4 @@ class BaseTile(Component):
         get the simulation result
         """
         self.check_finish()
-        # get the range of the computation
-        computation_time = sum([
-            end - start for start, end in self.computation_range_time
-        ])
-        return computation_time * 1. / end_time
+        return self.computation_statistics.busy_time * 1. / end_time
@@ -1,3 +1,4 @@
 #-*-coding:utf-8-*-
-# from mnsim_noc.Wire.base_wire import BaseWire
-from mnsim_noc.Wire.wire_net import WireNet
\ No newline at end of file
+from mnsim_noc.Wire.base_wire import BaseWire
+from mnsim_noc.Wire.wire_net import WireNet
+from mnsim_noc.Wire.route_table import Route, RouteTable
\ No newline at end of file
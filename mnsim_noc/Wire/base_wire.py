@@ -7,24 +7,54 @@
 @CreateTime:
     2021/10/08 18:17
 """
+import numpy as np
 from mnsim_noc.utils.component import Component
 from mnsim_noc.Buffer.base_buffer import get_data_size
 
 class BaseWire(Component):
     """
     Base Wire Class for bahahavior-driven simulation
-    position: tuple -> (start, end)
+    the state is kept in the arrays of the wire net, this is the view of one wire
+    wire_position: tuple -> (start, end)
         start, end -> (row, column)
+    BaseWire(wire_net, wire_id) is the wire in the wire net,
+    the transparent flag is set on the wire net for all wires
     """
     REGISTRY = "wire"
     NAME = "behavior_driven"
-    def __init__(self, wire_position, band_width):
+    def __init__(self, wire_net, wire_id):
         super(BaseWire, self).__init__()
-        self.wire_position = wire_position
-        self.band_width = band_width
-        self.running_state = False
-        self.transparent_flag = False
-        self.transfer_time_range = {}
+        self.wire_net = wire_net
+        self.wire_id = wire_id
+
+    @property
+    def wire_position(self):
+        """
+        wire position
+        """
+        return self.wire_net.wire_position_list[self.wire_id]
+
+    @property
+    def band_width(self):
+        """
+        band width of this wire
+        """
+        return float(self.wire_net.wire_band_width[self.wire_id])
+
+    @band_width.setter
+    def band_width(self, band_width):
+        """
+        set the band width of this wire, the routes are updated
+        use the set_band_width of the wire net for many wires
+        """
+        self.wire_net.set_band_width(np.array([self.wire_id]), band_width)
+
+    @property
+    def running_state(self):
+        """
+        running state of this wire
+        """
+        return bool(self.wire_net.wire_state[self.wire_id])
 
     def get_transfer_time(self, data_list):
         """
@@ -37,40 +67,18 @@ class BaseWire(Component):
         """
         set the wire state
         """
-        # add the transfer time range
-        if communication_id not in self.transfer_time_range.keys():
-            self.transfer_time_range[communication_id] = []
-        if wire_state == True:
-            # add new range
-            self.transfer_time_range[communication_id].append([current_time])
-        else:
-            # add end time
-            self.transfer_time_range[communication_id][-1].append(current_time)
-        if self.transparent_flag:
-            return None
-        assert wire_state != self.running_state
-        self.running_state = wire_state
-        return None
+        self.wire_net.set_data_path_state(
+            [self.wire_position], wire_state, communication_id, current_time
+        )
 
     def get_wire_state(self):
         """
         get the wire state
         """
-        if self.transparent_flag:
-            return False
         return self.running_state
 
-    def set_transparent_flag(self, transparent_flag):
-        """
-        set the transparent flag
-        """
-        self.transparent_flag = transparent_flag
-
     def get_running_rate(self, end_time):
         """
         get the running rate
         """
-        transfer_total_time = 0.
-        for _, value in self.transfer_time_range.items():
-            transfer_total_time += sum([end-start for start, end in value])
-        return transfer_total_time * 1. / end_time
+        return float(self.wire_net.wire_busy_time[self.wire_id]) / end_time
@@ -0,0 +1,190 @@
+#-*-coding:utf-8-*-
+"""
+@FileName:
+    route_table.py
+@Description:
+    route table for the communications, built once after mapping
+@CreateTime:
+    2026/10/17 00:10
+"""
+import itertools
+import numpy as np
+from mnsim_noc.utils.component import Component
+
+class Route(object):
+    """
+    route from the start position to the end position
+    path: list of wire position
+    wire_index: index array of the wires
+    transfer_factor: transfer time of one bit, by the link model of the wire net
+    hop_latency: fixed latency on the hops, by the link model of the wire net
+    """
+    __slots__ = ["path", "wire_index", "transfer_factor", "hop_latency"]
+    def __init__(self, path, wire_index, transfer_factor, hop_latency=0.):
+        self.path = path
+        self.wire_index = wire_index
+        self.transfer_factor = transfer_factor
+        self.hop_latency = hop_latency
+
+    def get_transfer_time(self, data_size):
+        """
+        get the transfer time of the data size on this route
+        """
+        return self.hop_latency + data_size * self.transfer_factor
+
+class TreeRoute(Route):
+    """
+    tree route from the start position to the end positions, the union of the branch routes
+    the branches fork at the routers and transfer in parallel
+    """
+    __slots__ = ["branch_list"]
+    def __init__(self, branch_list):
+        path = list(dict.fromkeys(
+            wire_position for branch in branch_list for wire_position in branch.path
+        ))
+        wire_index = np.array(list(dict.fromkeys(
+            wire_id for branch in branch_list for wire_id in branch.wire_index.tolist()
+        )), dtype=np.int64)
+        super(TreeRoute, self).__init__(path, wire_index, None)
+        self.branch_list = branch_list
+
+    def get_transfer_time(self, data_size):
+        """
+        get the transfer time of the data size on this route, the slowest branch
+        """
+        return max([branch.get_transfer_time(data_size) for branch in self.branch_list])
+
+class RouteTable(Component):
+    """
+    route table, (start_position, end_position) -> Route
+    routes are static after mapping, so any schedule can reuse them
+    """
+    REGISTRY = "route_table"
+    NAME = "xy"
+    def __init__(self, wire_net):
+        super(RouteTable, self).__init__()
+        self.wire_net = wire_net
+        self.route_dict = {}
+        # minimal route list, (start_position, end_position, path_num) -> list of Route
+        self.route_list_dict = {}
+        # tree route, (start_position, end_position_list) -> TreeRoute
+        self.tree_route_dict = {}
+
+    def _get_xy_path(self, start_position, end_position):
+        """
+        get the XY dimension order path, first left or right
+        """
+        assert start_position != end_position
+        current_position = [start_position[0], start_position[1]]
+        path = []
+        while True:
+            path.append(tuple(current_position))
+            # first left or right
+            if current_position[1] != end_position[1]:
+                current_position[1] += 1 if current_position[1] < end_position[1] else -1
+            elif current_position[0] != end_position[0]:
+                current_position[0] += 1 if current_position[0] < end_position[0] else -1
+            else:
+                break
+        return [(path[i], path[i+1]) for i in range(len(path)-1)]
+
+    def _get_minimal_path_list(self, start_position, end_position, path_num):
+        """
+        get at most path_num minimal paths, XY first, YX second, and the others
+        each minimal path is the order of the horizontal and vertical hops
+        """
+        horizontal_num = abs(end_position[1] - start_position[1])
+        hop_num = horizontal_num + abs(end_position[0] - start_position[0])
+        # positions of the horizontal hops, XY is the first one, YX is the last one
+        # different positions for different paths, so the duplicates are skipped here
+        horizontal_set = set()
+        path_list = []
+        for horizontal in itertools.chain(
+            [tuple(range(horizontal_num)), tuple(range(hop_num - horizontal_num, hop_num))],
+            itertools.combinations(range(hop_num), horizontal_num)
+        ):
+            if len(path_list) >= path_num:
+                break
+            if horizontal in horizontal_set:
+                continue
+            horizontal_set.add(horizontal)
+            path_list.append(
+                self._get_hop_path(start_position, end_position, set(horizontal), hop_num)
+            )
+        return path_list
+
+    def _get_hop_path(self, start_position, end_position, horizontal, hop_num):
+        """
+        get the path, the hops in horizontal are left or right, the others are up or down
+        """
+        current_position = [start_position[0], start_position[1]]
+        path = []
+        for i in range(hop_num):
+            last_position = tuple(current_position)
+            if i in horizontal:
+                current_position[1] += 1 if current_position[1] < end_position[1] else -1
+            else:
+                current_position[0] += 1 if current_position[0] < end_position[0] else -1
+            path.append((last_position, tuple(current_position)))
+        return path
+
+    def _get_route(self, path):
+        """
+        get the route of the path
+        """
+        wire_index = self.wire_net.get_path_index(path)
+        return Route(path, wire_index, *self.wire_net.get_path_factor(wire_index))
+
+    def get_route(self, start_position, end_position):
+        """
+        get the route, build it if not in the table
+        """
+        key = (tuple(start_position), tuple(end_position))
+        if key not in self.route_dict:
+            self.route_dict[key] = self._get_route(self._get_xy_path(*key))
+        return self.route_dict[key]
+
+    def get_route_list(self, start_position, end_position, path_num):
+        """
+        get at most path_num minimal routes, the first one is the XY route
+        """
+        key = (tuple(start_position), tuple(end_position))
+        if (key, path_num) not in self.route_list_dict:
+            xy_route = self.get_route(*key)
+            self.route_list_dict[(key, path_num)] = [xy_route] + [
+                self._get_route(path)
+                for path in self._get_minimal_path_list(*key, path_num)
+                if path != xy_route.path
+            ]
+        return self.route_list_dict[(key, path_num)]
+
+    def get_tree_route(self, start_position, end_position_list):
+        """
+        get the tree route, the union of the XY routes to the end positions
+        the XY routes from one start position share the prefix, so the union is a tree
+        """
+        key = (tuple(start_position), tuple(tuple(position) for position in end_position_list))
+        if key not in self.tree_route_dict:
+            self.tree_route_dict[key] = TreeRoute([
+                self.get_route(key[0], end_position) for end_position in key[1]
+            ])
+        return self.tree_route_dict[key]
+
+    def build(self, position_pair_list):
+        """
+        build the route table for all (start_position, end_position) pairs
+        """
+        for start_position, end_position in position_pair_list:
+            self.get_route(start_position, end_position)
+
+    def update_transfer_factor(self):
+        """
+        update the transfer factor after the band width or the link model changes
+        the tree routes use the branch routes, so they are updated too
+        """
+        route_list = list(self.route_dict.values())
+        for minimal_route_list in self.route_list_dict.values():
+            route_list.extend(minimal_route_list)
+        for route in route_list:
+            route.transfer_factor, route.hop_latency = \
+                self.wire_net.get_path_factor(route.wire_index)
@@ -11,7 +11,9 @@
 """
 import numpy as np
 from mnsim_noc.utils.component import Component
+from mnsim_noc.Buffer.base_buffer import get_data_size
 from mnsim_noc.Wire.base_wire import BaseWire
+from mnsim_noc.Wire.route_table import RouteTable
 
 def _get_map_key(wire_position):
     """
@@ -20,12 +22,14 @@ def _get_map_key(wire_position):
     """
     if wire_position[0][0] + wire_position[0][1] > \
         wire_position[1][0] + wire_position[1][1]:
-        return str((wire_position[1], wire_position[0]))
-    return str(wire_position)
+        return (tuple(wire_position[1]), tuple(wire_position[0]))
+    return (tuple(wire_position[0]), tuple(wire_position[1]))
 
 class WireNet(Component):
     """
     wire net class for behavior-driven simulation
+    wires are identified by the integer index,
+    the state, band width and busy time are kept in arrays
     """
     REGISTRY = "wire_net"
     NAME = "behavior_driven"
@@ -37,92 +41,235 @@ class WireNet(Component):
         super(WireNet, self).__init__()
         # init wire net
         self.tile_net_shape = tile_net_shape
-        self.wires = []
-        self.wires_map = {}
+        self.wire_position_list = []
+        self.wire_index_map = {}
         # horizontally wire
         for i in range(tile_net_shape[0]):
             for j in range(tile_net_shape[1] - 1):
-                wire_position = ((i, j), (i, j + 1))
-                wire = BaseWire(wire_position, band_width)
-                self.wires.append(wire)
-                self.wires_map[_get_map_key(wire_position)] = wire
+                self._add_wire(((i, j), (i, j + 1)))
         # vertically wire
         for j in range(tile_net_shape[1]):
             for i in range(tile_net_shape[0] - 1):
-                wire_position = ((i, j), (i + 1, j))
-                wire = BaseWire(wire_position, band_width)
-                self.wires.append(wire)
-                self.wires_map[_get_map_key(wire_position)] = wire
+                self._add_wire(((i, j), (i + 1, j)))
+        # wire state arrays
+        wire_num = len(self.wire_position_list)
+        self.wire_state = np.zeros(wire_num, dtype=bool)
+        self.wire_band_width = np.full(wire_num, band_width, dtype=np.float64)
+        self.wire_busy_time = np.zeros(wire_num, dtype=np.float64)
+        self.wires = [BaseWire(self, i) for i in range(wire_num)]
         self.transparent_flag = False
+        # the released wires since the last pop, None for not recorded
+        self.released_wire = None
+        # link model, summed for the transfer time on each hop,
+        # pipelined for the router delay on each hop and the serialization once
+        self.link_model = "summed"
+        self.router_delay = 0.
+        # route table, built after mapping
+        self.route_table = RouteTable(self)
+        # packet mode, the transfers are split into packets and pipelined across the hops
+        self.packet_mode = False
+        self.packet_size = None
+        self.vc_num = None
+        self.queue_depth = None
+        self.wire_vc_number = None
+        self.wire_free_time = None
+
+    def _add_wire(self, wire_position):
+        """
+        add one wire with the next index
+        """
+        self.wire_index_map[_get_map_key(wire_position)] = len(self.wire_position_list)
+        self.wire_position_list.append(wire_position)
 
     def set_transparent_flag(self, transparent_flag):
         """
         set the transparent flag
         """
-        for wire in self.wires:
-            wire.set_transparent_flag(transparent_flag)
         self.transparent_flag = transparent_flag
 
-    def get_all_wire_state(self, all_wire_state, transfer_path_keys):
+    def set_link_model(self, link_model="summed", router_delay=0.):
+        """
+        set the link model, and update the transfer time of the routes
+        summed: data_size / band_width on each hop
+        pipelined: router_delay on each hop, and data_size / the min band width once
+        """
+        assert link_model in ("summed", "pipelined"), f"unknown link model {link_model}"
+        self.link_model = link_model
+        self.router_delay = router_delay
+        self.route_table.update_transfer_factor()
+
+    def set_band_width(self, transfer_path, band_width):
+        """
+        set the band width of the wires, and update the transfer time of the routes
+        transfer_path: list of wire position or index array
+        band_width: one value or one value for each wire
+        """
+        self.wire_band_width[self.get_path_index(transfer_path)] = band_width
+        self.route_table.update_transfer_factor()
+
+    def get_path_factor(self, transfer_path):
+        """
+        get the transfer factor and hop latency of the path, by the link model
+        transfer time is hop_latency + data_size * transfer_factor
+        """
+        path_index = self.get_path_index(transfer_path)
+        reciprocal_band_width = 1. / self.wire_band_width[path_index]
+        if self.link_model == "summed":
+            return float(reciprocal_band_width.sum()), 0.
+        return float(reciprocal_band_width.max()), len(path_index) * self.router_delay
+
+    def set_packet_mode(self, packet_size=512, vc_num=2, queue_depth=4):
+        """
+        set the packet mode, wormhole switching with virtual channels
+        packet_size: bits of one packet, the flits of one packet are coalesced
+        vc_num: number of the virtual channels on each wire, the transfers on one wire at most
+        queue_depth: number of the packets in the router input queue
+        """
+        assert packet_size > 0 and vc_num > 0 and queue_depth >= 0
+        self.packet_mode = True
+        self.packet_size = packet_size
+        self.vc_num = vc_num
+        self.queue_depth = queue_depth
+        wire_num = len(self.wire_position_list)
+        # the occupied virtual channels, and the time when the wire is free of the reserved packets
+        self.wire_vc_number = np.zeros(wire_num, dtype=np.int64)
+        self.wire_free_time = np.zeros(wire_num, dtype=np.float64)
+
+    def reserve_packet_path(self, transfer_path, data_size, current_time):
         """
-        set all wire state, with key and value
-        return dict with key and state
+        reserve the packets of the transfer on the path, return the transfer time
+        the packets on one wire are coalesced into one occupancy interval after the free time,
+        the head is pipelined across the hops with the router delay,
+        and the tail is held back by the downstream wire when the router input queue is full
         """
-        for transfer_path in transfer_path_keys:
-            all_wire_state[transfer_path] = self.wires_map[transfer_path].get_wire_state()
+        path_index = self.get_path_index(transfer_path)
+        band_width = self.wire_band_width[path_index].tolist()
+        free_time = self.wire_free_time[path_index].tolist()
+        serialization_time = [data_size / b for b in band_width]
+        packet_time = [min(self.packet_size, data_size) / b for b in band_width]
+        head_time = []
+        tail_time = []
+        for k in range(len(path_index)):
+            if k == 0:
+                head = current_time + self.router_delay
+            else:
+                head = head_time[k-1] + packet_time[k-1] + self.router_delay
+            if not self.transparent_flag:
+                head = max(head, free_time[k])
+            tail = head + serialization_time[k]
+            if k > 0:
+                tail = max(tail, tail_time[k-1] + self.router_delay + packet_time[k])
+            head_time.append(head)
+            tail_time.append(tail)
+        # back pressure, the upstream wire is held until the queue has space for the tail
+        for k in range(len(path_index) - 1, 0, -1):
+            tail_time[k-1] = max(
+                tail_time[k-1], tail_time[k] - (self.queue_depth + 1) * packet_time[k]
+            )
+        if not self.transparent_flag:
+            self.wire_free_time[path_index] = tail_time
+        self.wire_busy_time[path_index] += np.array(tail_time) - np.array(head_time)
+        return tail_time[-1] - current_time
+
+    def get_wire_index(self, wire_position):
+        """
+        get the index of the wire
+        """
+        return self.wire_index_map[_get_map_key(wire_position)]
+
+    def get_wire_name(self, wire_id):
+        """
+        get the name of the wire, the wire position
+        """
+        return str(self.wire_position_list[wire_id])
+
+    def get_path_index(self, transfer_path):
+        """
+        get the wire index array of the transfer path
+        transfer path can be list of wire position or index array
+        """
+        if isinstance(transfer_path, np.ndarray):
+            return transfer_path
+        return np.array(
+            [self.get_wire_index(path) for path in transfer_path], dtype=np.int64
+        )
+
+    def get_route(self, start_position, end_position):
+        """
+        get the route from the route table
+        """
+        return self.route_table.get_route(start_position, end_position)
+
+    def get_tree_route(self, start_position, end_position_list):
+        """
+        get the tree route from the route table
+        """
+        return self.route_table.get_tree_route(start_position, end_position_list)
+
+    def set_released_wire(self):
+        """
+        record the released wires, for the communications waiting on them
+        """
+        self.released_wire = set()
+
+    def pop_released_wire(self):
+        """
+        get and clear the released wires
+        """
+        released_wire = self.released_wire
+        self.released_wire = set()
+        return released_wire
 
     def get_data_path_state(self, transfer_path):
         """
         get data path state
         return False only when all wires are idle
         """
-        all_state = [self.wires_map[_get_map_key(path)].get_wire_state()
-            for path in transfer_path
-        ]
-        return any(all_state)
+        return bool(self.wire_state[self.get_path_index(transfer_path)].any())
 
     def set_data_path_state(self, transfer_path, state, communication_id, current_time):
         """
-        set data path state, and record transfer range time
+        set data path state, and record the busy time
         """
-        for path in transfer_path:
-            self.wires_map[_get_map_key(path)].set_wire_state(state, communication_id, current_time)
+        path_index = self.get_path_index(transfer_path)
+        if not state and self.released_wire is not None:
+            self.released_wire.update(path_index.tolist())
+        if self.packet_mode:
+            # one virtual channel on each wire, the busy time is recorded in the reservation
+            self.wire_vc_number[path_index] += 1 if state else -1
+            if not self.transparent_flag:
+                assert (self.wire_vc_number[path_index] <= self.vc_num).all()
+                self.wire_state[path_index] = self.wire_vc_number[path_index] >= self.vc_num
+            return None
+        if not self.transparent_flag:
+            assert not (self.wire_state[path_index] == state).any()
+            self.wire_state[path_index] = state
+        # busy time, minus the start time and add the end time
+        self.wire_busy_time[path_index] += current_time if not state else -current_time
 
     def get_wire_transfer_time(self, transfer_path, data_list):
         """
         get wire transfer time
         """
-        transfer_time = 0
-        for path in transfer_path:
-            wire = self.wires_map[_get_map_key(path)]
-            transfer_time += wire.get_transfer_time(data_list)
-        return transfer_time
+        data_size = sum([get_data_size(data) for data in data_list])
+        transfer_factor, hop_latency = self.get_path_factor(transfer_path)
+        return hop_latency + data_size * transfer_factor
 
     def check_finish(self):
         """
         check if all wires are idle
         """
-        for wire in self.wires:
-            assert wire.get_wire_state() == False
+        assert not self.wire_state.any()
+        if self.packet_mode:
+            assert not self.wire_vc_number.any()
 
     def get_running_rate(self, end_time):
         """
         show wire rate, two decimal places
         """
-        horizontal_rate = np.zeros(
-            [self.tile_net_shape[0], self.tile_net_shape[1] - 1]
-        )
-        for i in range(self.tile_net_shape[0]):
-            for j in range(self.tile_net_shape[1] - 1):
-                wire_position = ((i, j), (i, j + 1))
-                horizontal_rate[i, j] = \
-                    self.wires_map[_get_map_key(wire_position)].get_running_rate(end_time)
-        vectical_rate = np.zeros(
-            [self.tile_net_shape[0] - 1, self.tile_net_shape[1]]
-        )
-        for i in range(self.tile_net_shape[0] - 1):
-            for j in range(self.tile_net_shape[1]):
-                wire_position = ((i, j), (i + 1, j))
-                vectical_rate[i, j] = \
-                    self.wires_map[_get_map_key(wire_position)].get_running_rate(end_time)
+        row_num, column_num = self.tile_net_shape
+        horizontal_num = row_num * (column_num - 1)
+        running_rate = self.wire_busy_time * 1. / end_time
+        horizontal_rate = running_rate[:horizontal_num].reshape(row_num, column_num - 1)
+        vectical_rate = running_rate[horizontal_num:].reshape(column_num, row_num - 1).T
         return horizontal_rate, vectical_rate
@@ -7,59 +7,110 @@
 @CreateTime:
     2021/10/08 18:48
 """
-import pickle
-
 import click
 
 from mnsim_noc.Array import BaseArray
 from mnsim_noc.utils.yaml_io import read_yaml
+from mnsim_noc.utils.workload import load_task_behavior, load_task_behavior_list, \
+    compile_task_behavior, get_compiled_path
 
 
-@click.command(help="mnsim noc behavior driven simulation")
+@click.group(help="mnsim noc behavior driven simulation", invoke_without_command=True)
 @click.option("--config", type=str, default="config.yaml", help="config file path")
 @click.option("--task", type=str, help="task file path list")
 @click.option("--mapping_strategy", "-M", type=str, help="mapping strategy")
 @click.option("--schedule_strategy", "-S", type=str, help="schedule strategy")
 @click.option("--transprent_flag", "-T", is_flag=True, default=False, help="transparent mode")
-def main(config, task, mapping_strategy, schedule_strategy, transprent_flag):
+@click.option("--engine", "-E", type=str, help="simulation engine, behavior_driven or event_driven")
+@click.option("--trace", type=str,
+    help="trace file path, json for chrome trace, otherwise csv, not with --resume"
+)
+@click.option("--statistics_flag", is_flag=True, default=False, help="only keep the statistics")
+@click.option("--checkpoint", type=str, help="checkpoint file path, saved periodically in the run")
+@click.option("--checkpoint_interval", type=float, default=600.,
+    help="checkpoint interval, seconds"
+)
+@click.option("--resume", type=str,
+    help="resume the run from the checkpoint file, the trace of the checkpoint run is continued"
+)
+@click.pass_context
+def main(ctx, config, task, mapping_strategy, schedule_strategy, transprent_flag, engine, trace,
+    statistics_flag, checkpoint, checkpoint_interval, resume
+):
     """
     main function
     """
-    # load array config
-    array_config = read_yaml(config)
-    # load array config
-    image_num = array_config.get("image_num", 1)
-    tile_net_shape = (
-        array_config.get("tile_array_row", 16),
-        array_config.get("tile_array_col", 16)
-    )
-    buffer_size = (
-        array_config.get("input_buffer_size", 822400),
-        array_config.get("output_buffer_size", 822400)
-    ) # default 32768 bits, 4KB
-    band_width = array_config.get("band_width", 1) # default, 1Gbps
-    mapping_strategy = array_config.get("mapping_strategy", "naive") \
-        if mapping_strategy is None else mapping_strategy
-    schedule_strategy = array_config.get("schedule_strategy", "naive") \
-        if schedule_strategy is None else schedule_strategy
-    transparent_flag = array_config.get("transparent_flag", False) \
-        if transprent_flag is None else transprent_flag
-    # overide config
-    # load task config behavior list
-    task_config_path_list = array_config.get("task_config_path_list", []) \
-        if task is None else task.split(",")
-    assert len(task_config_path_list) > 0, "task config path list is empty"
-    task_behavior_list = []
-    for i, task_config_path in enumerate(task_config_path_list):
-        print(f"loading {i}th task config from {task_config_path} ")
-        with open(task_config_path, "rb") as f:
-            task_behavior_list.append(pickle.load(f))
-    # create array
-    array = BaseArray(
-        task_behavior_list, image_num,
-        tile_net_shape, buffer_size, band_width,
-        mapping_strategy, schedule_strategy, transparent_flag
-    )
+    if ctx.invoked_subcommand is not None:
+        return None
+    if resume is not None and trace is not None:
+        # a new trace sink would truncate the trace, the sink in the checkpoint appends to it
+        raise click.UsageError(
+            "--trace can not be used with --resume, the trace of the checkpoint run is continued"
+        )
+    if resume is not None:
+        # the array and the run state are restored
+        array = BaseArray.load_checkpoint(resume)
+    else:
+        # load array config
+        array_config = read_yaml(config)
+        # overide config
+        for key, value in [
+            ("mapping_strategy", mapping_strategy),
+            ("schedule_strategy", schedule_strategy),
+            ("transparent_flag", transprent_flag),
+            ("engine", engine),
+            ("statistics_flag", True if statistics_flag else None),
+        ]:
+            if value is not None:
+                array_config[key] = value
+        # load task config behavior list
+        task_config_path_list = array_config.get("task_config_path_list", []) \
+            if task is None else task.split(",")
+        assert len(task_config_path_list) > 0, "task config path list is empty"
+        task_behavior_list = load_task_behavior_list(task_config_path_list, logger=print)
+        # create array
+        array = BaseArray.from_config(task_behavior_list, array_config)
+    if checkpoint is not None:
+        array.set_checkpoint(checkpoint, checkpoint_interval)
     # array run and show config
-    array.run()
+    if trace is not None:
+        from mnsim_noc.utils.trace import get_trace_sink
+        array.set_trace_sink(get_trace_sink(trace))
+    try:
+        array.run()
+    finally:
+        if array.trace_sink is not None:
+            array.trace_sink.close()
     array.show_simulation_result()
+    return None
+
+
+@main.command(help="sweep the config grid on a process pool")
+@click.option("--grid", type=str, required=True, help="grid config file path")
+@click.option("--worker_num", "-j", type=int, default=None,
+    help="process number, default cpu count"
+)
+@click.option("--output", "-o", type=str, default="sweep_result.csv", help="result table path")
+def sweep(grid, worker_num, output):
+    """
+    sweep function
+    """
+    from mnsim_noc.sweep import run_sweep
+    run_sweep(read_yaml(grid), worker_num, output)
+
+
+@main.command(name="compile", help="compile the task pkl files into the npz workload")
+@click.option("--task", type=str, required=True, help="task file path list, split by comma")
+@click.option("--output_dir", "-o", type=str, default=None, help="output dir, default the task dir")
+def compile_task(task, output_dir):
+    """
+    compile function
+    """
+    for task_config_path in task.split(","):
+        compiled_path = get_compiled_path(task_config_path, output_dir)
+        compile_task_behavior(load_task_behavior(task_config_path), compiled_path)
+        print(f"compile {task_config_path} to {compiled_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#-*-coding:utf-8-*-
+"""
+@FileName:
+    sweep.py
+@Description:
+    sweep the config grid on a process pool
+@CreateTime:
+    2026/10/17 01:10
+"""
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from mnsim_noc.Array import BaseArray
+from mnsim_noc.utils import getLogger
+from mnsim_noc.utils.yaml_io import read_yaml
+from mnsim_noc.utils.workload import load_task_behavior
+
+LOGGER = getLogger("sweep")
+# task behavior shared by the workers, task config path -> task behavior
+TASK_BEHAVIOR_DICT = {}
+RESULT_KEY_LIST = ["task_id", "latency", "throughput", "total_time", "run_time", "error"]
+
+def _init_worker(task_behavior_dict):
+    """
+    init the worker with the loaded task behavior
+    """
+    TASK_BEHAVIOR_DICT.update(task_behavior_dict)
+
+def get_config_list(sweep_config):
+    """
+    get the config list of the grid
+    sweep_config: dict
+        base_config: path of the base config file, optional
+        base: dict to update the base config, optional
+        grid: dict, key -> value list, the keys are the same as the config file
+            tile_net_shape -> [row, column] for tile_array_row and tile_array_col
+    return the grid key list and the config list
+    """
+    base_config = {}
+    if "base_config" in sweep_config:
+        base_config.update(read_yaml(sweep_config["base_config"]))
+    base_config.update(sweep_config.get("base", {}))
+    grid = sweep_config.get("grid", {})
+    grid_key_list = list(grid.keys())
+    config_list = []
+    for value_list in itertools.product(*[grid[key] for key in grid_key_list]):
+        array_config = dict(base_config)
+        for key, value in zip(grid_key_list, value_list):
+            if key == "tile_net_shape":
+                array_config["tile_array_row"], array_config["tile_array_col"] = value
+            array_config[key] = value
+        config_list.append(array_config)
+    return grid_key_list, config_list
+
+def run_config(array_config):
+    """
+    run one config in the worker, return the result of each task
+    """
+    start_time = time.time()
+    try:
+        # shallow copy for the task id, the dependence is not modified
+        task_behavior_list = [
+            [dict(tile_behavior) for tile_behavior in TASK_BEHAVIOR_DICT[path]]
+            for path in array_config["task_config_path_list"]
+        ]
+        # only the latency and throughput are needed, statistics mode by default
+        array = BaseArray.from_config(
+            task_behavior_list, dict({"statistics_flag": True}, **array_config)
+        )
+        array.run()
+        latency_throughput = array.get_latency_throughput()
+    except Exception as e: # pylint: disable=broad-except
+        return [{"error": repr(e), "run_time": time.time() - start_time}]
+    run_time = time.time() - start_time
+    return [
+        dict(task_id=task_id, run_time=run_time, error="", **result)
+        for task_id, result in latency_throughput.items()
+    ]
+
+def run_sweep(sweep_config, worker_num=None, output=None):
+    """
+    run all configs of the grid, and collect the result into one table
+    worker_num: process number, 0 or 1 to run in this process
+    """
+    grid_key_list, config_list = get_config_list(sweep_config)
+    LOGGER.info(f"Sweep {len(config_list)} configs on {grid_key_list}")
+    # load the task behavior once, shared by the workers
+    task_behavior_dict = {}
+    for array_config in config_list:
+        for path in array_config.get("task_config_path_list", []):
+            if path not in task_behavior_dict:
+                LOGGER.info(f"loading task config from {path}")
+                task_behavior_dict[path] = load_task_behavior(path)
+    worker_num = os.cpu_count() if worker_num is None else worker_num
+    if worker_num <= 1:
+        _init_worker(task_behavior_dict)
+        result_list = [run_config(array_config) for array_config in config_list]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=worker_num, initializer=_init_worker, initargs=(task_behavior_dict,)
+        ) as executor:
+            result_list = list(executor.map(run_config, config_list))
+    # collect the table
+    table = []
+    for i, (array_config, result) in enumerate(zip(config_list, result_list)):
+        for task_result in result:
+            row = {"config_id": i}
+            row.update((key, array_config.get(key)) for key in grid_key_list)
+            row.update((key, task_result.get(key)) for key in RESULT_KEY_LIST)
+            table.append(row)
+            LOGGER.info(", ".join(f"{k}: {v}" for k, v in row.items()))
+    if output is not None:
+        with open(output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["config_id"] + grid_key_list + RESULT_KEY_LIST)
+            writer.writeheader()
+            writer.writerows(table)
+        LOGGER.info(f"Sweep result is saved in {output}")
+    return table
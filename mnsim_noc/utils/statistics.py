@@ -0,0 +1,48 @@
+#-*-coding:utf-8-*-
+"""
+@FileName:
+    statistics.py
+@Description:
+    running statistics of the time ranges, the memory is bounded
+@CreateTime:
+    2026/10/17 03:10
+"""
+import math
+
+class RangeStatistics(object):
+    """
+    running statistics of the time ranges
+    busy_time: sum of the duration
+    count: number of the ranges
+    histogram: log2 bucket -> count, duration in [2**(bucket-1), 2**bucket)
+    """
+    __slots__ = ["busy_time", "count", "histogram"]
+    def __init__(self):
+        self.busy_time = 0.
+        self.count = 0
+        self.histogram = {}
+
+    def add(self, start, end):
+        """
+        add one time range
+        """
+        duration = end - start
+        self.busy_time += duration
+        self.count += 1
+        bucket = math.frexp(duration)[1]
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def get_histogram(self):
+        """
+        get the histogram, list of (low, high, count) in the increasing order
+        """
+        return [
+            (math.ldexp(1., bucket - 1), math.ldexp(1., bucket), self.histogram[bucket])
+            for bucket in sorted(self.histogram.keys())
+        ]
+
+    def __getstate__(self):
+        return (self.busy_time, self.count, self.histogram)
+
+    def __setstate__(self, state):
+        self.busy_time, self.count, self.histogram = state
@@ -0,0 +1,168 @@
+#-*-coding:utf-8-*-
+"""
+@FileName:
+    trace.py
+@Description:
+    streaming trace sink for the tile, communication and wire events
+    the events are kept in a chunk and flushed to the file when the chunk is full,
+    so the memory is constant for long runs
+@CreateTime:
+    2026/10/17 02:50
+"""
+import abc
+import csv
+import json
+import os
+from mnsim_noc.utils.component import Component
+
+class TraceSink(Component):
+    """
+    trace sink, each event is (category, name, start, end, args)
+    category: tile, communication or wire
+    time is in ns, the same as the simulation
+    """
+    REGISTRY = "trace_sink"
+    def __init__(self, path, chunk_size=65536):
+        super(TraceSink, self).__init__()
+        self.path = os.path.abspath(path)
+        self.chunk_size = chunk_size
+        self.chunk = []
+        self.event_number = 0
+        self.file = open(self.path, "w", newline="", encoding="utf-8")
+        self._set_writer()
+        self._write_head()
+
+    def __getstate__(self):
+        # flush the chunk, and keep the file offset for the checkpoint
+        self.flush()
+        state = super(TraceSink, self).__getstate__()
+        state["file"] = self.file.tell()
+        state.pop("writer", None)
+        return state
+
+    def __setstate__(self, state):
+        # reopen the file, drop the events after the checkpoint
+        super(TraceSink, self).__setstate__(state)
+        self.file = open(self.path, "r+", newline="", encoding="utf-8")
+        self.file.seek(state["file"])
+        self.file.truncate()
+        self._set_writer()
+
+    def _set_writer(self):
+        """
+        set the writer on the file
+        """
+        return None
+
+    def _write_head(self):
+        """
+        write the head of the file
+        """
+        return None
+
+    @abc.abstractmethod
+    def _write_chunk(self, chunk):
+        """
+        write the chunk of events into the file
+        """
+        raise NotImplementedError
+
+    def _write_tail(self):
+        """
+        write the tail of the file
+        """
+        return None
+
+    def add_event(self, category, name, start, end, args=None):
+        """
+        add one event, flush when the chunk is full
+        """
+        self.chunk.append((category, name, start, end, args))
+        if len(self.chunk) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        flush the chunk into the file
+        """
+        if len(self.chunk) > 0:
+            self._write_chunk(self.chunk)
+            self.event_number += len(self.chunk)
+            self.chunk = []
+        self.file.flush()
+
+    def close(self):
+        """
+        flush and close the file
+        """
+        if self.file.closed:
+            return None
+        self.flush()
+        self._write_tail()
+        self.file.close()
+        self.logger.info(f"{self.event_number} trace events are saved in {self.path}")
+        return None
+
+class CSVTraceSink(TraceSink):
+    """
+    csv trace sink, one row for each event
+    """
+    NAME = "csv"
+    def _set_writer(self):
+        self.writer = csv.writer(self.file)
+
+    def _write_head(self):
+        self.writer.writerow(["category", "name", "start", "end", "args"])
+
+    def _write_chunk(self, chunk):
+        self.writer.writerows(
+            (category, name, start, end, "" if args is None else args)
+            for category, name, start, end, args in chunk
+        )
+
+class ChromeTraceSink(TraceSink):
+    """
+    chrome trace sink, the JSON array format for Perfetto and chrome://tracing
+    one process for each category and one thread for each name, the time is in us
+    """
+    NAME = "chrome"
+    CATEGORY_LIST = ["tile", "communication", "wire"]
+    def _write_head(self):
+        self.thread_id = {}
+        self.event_separator = ""
+        self.file.write("[\n")
+        for pid, category in enumerate(self.CATEGORY_LIST):
+            self._write_event({
+                "name": "process_name", "ph": "M", "pid": pid, "args": {"name": category}
+            })
+
+    def _write_event(self, event):
+        self.file.write(self.event_separator + json.dumps(event, separators=(",", ":")))
+        self.event_separator = ",\n"
+
+    def _write_chunk(self, chunk):
+        for category, name, start, end, args in chunk:
+            pid = self.CATEGORY_LIST.index(category)
+            if (pid, name) not in self.thread_id:
+                self.thread_id[(pid, name)] = len(self.thread_id)
+                self._write_event({
+                    "name": "thread_name", "ph": "M", "pid": pid,
+                    "tid": self.thread_id[(pid, name)], "args": {"name": name}
+                })
+            event = {
+                "name": name, "cat": category, "ph": "X", "pid": pid,
+                "tid": self.thread_id[(pid, name)], "ts": start / 1e3, "dur": (end - start) / 1e3
+            }
+            if args is not None:
+                event["args"] = {"communication": args}
+            self._write_event(event)
+
+    def _write_tail(self):
+        self.file.write("\n]\n")
+
+def get_trace_sink(path, chunk_size=65536):
+    """
+    get the trace sink by the suffix of the path, json for chrome, otherwise csv
+    """
+    sink_name = "chrome" if path.endswith(".json") else "csv"
+    return TraceSink.get_class_(sink_name)(path, chunk_size)
@@ -0,0 +1,75 @@
+#-*-coding:utf-8-*-
+"""
+@FileName:
+    wake_up.py
+@Description:
+    wake up list and dirty queue for the event driven simulation
+@CreateTime:
+    2026/10/16 23:10
+"""
+import heapq
+
+class WakeUp(object):
+    """
+    wake up list, each item is (dirty set, key)
+    when called, add the key to the dirty set
+    """
+    __slots__ = ["wake_up_list"]
+    def __init__(self):
+        self.wake_up_list = []
+
+    def add(self, dirty_set, key):
+        """
+        add one dependant to wake up
+        """
+        self.wake_up_list.append((dirty_set, key))
+
+    def __call__(self):
+        """
+        mark all dependants dirty
+        """
+        for dirty_set, key in self.wake_up_list:
+            dirty_set.add(key)
+
+    def __getstate__(self):
+        return self.wake_up_list
+
+    def __setstate__(self, state):
+        self.wake_up_list = state
+
+class DirtyQueue(object):
+    """
+    dirty queue, pop the key in the increasing order
+    one key is only once in the queue
+    """
+    __slots__ = ["heap", "flag"]
+    def __init__(self, key_list=()):
+        self.heap = list(key_list)
+        heapq.heapify(self.heap)
+        self.flag = set(self.heap)
+
+    def add(self, key):
+        """
+        add the key to the queue
+        """
+        if key not in self.flag:
+            self.flag.add(key)
+            heapq.heappush(self.heap, key)
+
+    def pop(self):
+        """
+        pop the min key
+        """
+        key = heapq.heappop(self.heap)
+        self.flag.remove(key)
+        return key
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __getstate__(self):
+        return self.heap
+
+    def __setstate__(self, state):
+        self.heap = state
+        self.flag = set(state)
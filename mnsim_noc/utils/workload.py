@@ -0,0 +1,296 @@
+#-*-coding:utf-8-*-
+"""
+@FileName:
+    workload.py
+@Description:
+    load the task behavior of the workload
+    the compiled workload is a npz file with flat arrays of the dependences and data blocks,
+    and the tiles read it through the views without copy
+    the npz file is memory-mapped read only, so the processes share the same pages
+    the data blocks of each dependence are decoded once on the first read and cached
+@CreateTime:
+    2026/10/17 01:00
+"""
+import os
+import pickle
+import struct
+import zipfile
+import numpy as np
+from mnsim_noc.Buffer.base_buffer import get_data_block
+
+# None in the data block
+NONE_VALUE = np.iinfo(np.int64).min
+DATA_KEY_LIST = ["wait", "output", "drop"]
+COMPILED_SUFFIX = ".npz"
+
+def _get_offset(length_list):
+    """
+    get the offset array from the length list
+    """
+    offset = np.zeros(len(length_list) + 1, dtype=np.int64)
+    np.cumsum(length_list, out=offset[1:])
+    return offset
+
+def compile_task_behavior(task_behavior, path):
+    """
+    compile one task behavior into the npz file
+    tile i has the dependence dependence_offset[i]:dependence_offset[i+1],
+    dependence j has the data block key_offset[j]:key_offset[j+1] of the key
+    """
+    array_dict = {}
+    array_dict["tile_info"] = np.array([
+        [tile_behavior["layer_id"], tile_behavior["tile_id"]] for tile_behavior in task_behavior
+    ], dtype=np.int64).reshape(-1, 2)
+    for key in ["target_tile_id", "source_tile_id"]:
+        array_dict[f"{key}_offset"] = _get_offset([
+            len(tile_behavior[key]) for tile_behavior in task_behavior
+        ])
+        array_dict[key] = np.array([
+            value for tile_behavior in task_behavior for value in tile_behavior[key]
+        ], dtype=np.int64)
+    dependence_list = [
+        dependence for tile_behavior in task_behavior for dependence in tile_behavior["dependence"]
+    ]
+    array_dict["dependence_offset"] = _get_offset([
+        len(tile_behavior["dependence"]) for tile_behavior in task_behavior
+    ])
+    array_dict["latency"] = np.array([dependence["latency"] for dependence in dependence_list])
+    for key in DATA_KEY_LIST:
+        array_dict[f"{key}_offset"] = _get_offset([
+            len(dependence[key]) for dependence in dependence_list
+        ])
+        data_list = [data for dependence in dependence_list for data in dependence[key]]
+        for data in data_list:
+            for value in data:
+                if not (value is None or isinstance(value, (int, np.integer))):
+                    raise ValueError(f"data block {data} should be int or None")
+        array_dict[key] = np.array([
+            [NONE_VALUE if value is None else value for value in data] for data in data_list
+        ], dtype=np.int64).reshape(-1, 10)
+    # uncompressed, the members can be read directly
+    np.savez(path, **array_dict)
+
+def get_compiled_path(task_config_path, output_dir=None):
+    """
+    get the compiled path of the task config path
+    """
+    path = os.path.splitext(task_config_path)[0] + COMPILED_SUFFIX
+    if output_dir is not None:
+        path = os.path.join(output_dir, os.path.basename(path))
+    return path
+
+class CompiledTask(object):
+    """
+    compiled task behavior, list of the tile behavior views
+    path is set for the memory-mapped task, and it is pickled by the path
+    data_list_cache is the decoded data block list of (key, dependence index),
+    dependence_cache is the dependence view of the dependence index, both not pickled
+    """
+    def __init__(self, array_dict, path=None):
+        self.array_dict = array_dict
+        self.path = path
+        self.data_list_cache = {}
+        self.dependence_cache = {}
+
+    def __reduce__(self):
+        if self.path is not None:
+            return (load_compiled_task, (self.path,))
+        return (CompiledTask, (self.array_dict,))
+
+    def __len__(self):
+        return self.array_dict["tile_info"].shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [TileBehaviorView(self, i) for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("tile index out of range")
+        return TileBehaviorView(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield TileBehaviorView(self, i)
+
+    def get_range(self, key, index):
+        """
+        get the range of the index in the offset array of the key
+        """
+        offset = self.array_dict[f"{key}_offset"]
+        return int(offset[index]), int(offset[index + 1])
+
+    def get_data_list(self, key, dependence_index):
+        """
+        get the data block list of the dependence, None restored
+        decoded once and cached, the list is shared and should be read only
+        """
+        data_list = self.data_list_cache.get((key, dependence_index))
+        if data_list is None:
+            start, end = self.get_range(key, dependence_index)
+            data_list = [
+                get_data_block([None if value == NONE_VALUE else value for value in data])
+                for data in self.array_dict[key][start:end].tolist()
+            ]
+            self.data_list_cache[(key, dependence_index)] = data_list
+        return data_list
+
+    def get_dependence(self, dependence_index):
+        """
+        get the dependence view, created once and cached
+        """
+        dependence = self.dependence_cache.get(dependence_index)
+        if dependence is None:
+            dependence = DependenceView(self, dependence_index)
+            self.dependence_cache[dependence_index] = dependence
+        return dependence
+
+class TileBehaviorView(object):
+    """
+    view of one tile behavior, read like the tile behavior dict
+    the task id is set in the mapping, and kept in the view
+    """
+    __slots__ = ["task", "index", "task_id"]
+    KEY_LIST = ["task_id", "layer_id", "tile_id", "target_tile_id", "source_tile_id", "dependence"]
+    def __init__(self, task, index):
+        self.task = task
+        self.index = index
+        self.task_id = None
+
+    def keys(self):
+        """
+        keys of the tile behavior
+        """
+        return list(self.KEY_LIST)
+
+    def __iter__(self):
+        return iter(self.KEY_LIST)
+
+    def __contains__(self, key):
+        return key in self.KEY_LIST
+
+    def __getitem__(self, key):
+        if key == "task_id":
+            return self.task_id
+        if key == "layer_id":
+            return int(self.task.array_dict["tile_info"][self.index, 0])
+        if key == "tile_id":
+            return int(self.task.array_dict["tile_info"][self.index, 1])
+        if key in ("target_tile_id", "source_tile_id"):
+            start, end = self.task.get_range(key, self.index)
+            return self.task.array_dict[key][start:end].tolist()
+        if key == "dependence":
+            return DependenceListView(self.task, *self.task.get_range("dependence", self.index))
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key != "task_id":
+            raise KeyError(f"{key} is read only in the compiled workload")
+        self.task_id = value
+
+class DependenceListView(object):
+    """
+    view of the dependence list of one tile
+    """
+    __slots__ = ["task", "start", "end"]
+    def __init__(self, task, start, end):
+        self.task = task
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("dependence index out of range")
+        return self.task.get_dependence(self.start + index)
+
+    def __iter__(self):
+        for i in range(self.start, self.end):
+            yield self.task.get_dependence(i)
+
+class DependenceView(object):
+    """
+    view of one dependence, wait, output, drop, and latency
+    """
+    __slots__ = ["task", "index"]
+    KEY_LIST = DATA_KEY_LIST + ["latency"]
+    def __init__(self, task, index):
+        self.task = task
+        self.index = index
+
+    def keys(self):
+        """
+        keys of the dependence
+        """
+        return list(self.KEY_LIST)
+
+    def __iter__(self):
+        return iter(self.KEY_LIST)
+
+    def __getitem__(self, key):
+        if key == "latency":
+            return self.task.array_dict["latency"][self.index].item()
+        if key in DATA_KEY_LIST:
+            return self.task.get_data_list(key, self.index)
+        raise KeyError(key)
+
+def _get_member_array(raw, f, offset):
+    """
+    get the array of the npy member at the offset, a view of the raw memory map
+    """
+    f.seek(offset)
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+    assert not fortran_order and not dtype.hasobject, "only C order plain arrays are supported"
+    start = f.tell()
+    size = int(np.prod(shape)) * dtype.itemsize
+    return raw[start:start + size].view(dtype).reshape(shape)
+
+def load_compiled_task(path, mmap=True):
+    """
+    load the compiled task
+    mmap is True, map the npz file read only, and the arrays are views into it
+    mmap is False, all arrays are read once
+    """
+    if not mmap:
+        with np.load(path, allow_pickle=False) as data:
+            return CompiledTask(dict((key, data[key]) for key in data.files))
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    array_dict = {}
+    with open(path, "rb") as f, zipfile.ZipFile(f) as zf:
+        for info in zf.infolist():
+            assert info.compress_type == zipfile.ZIP_STORED, \
+                "the compiled workload should be uncompressed"
+            # local file header, 30 bytes with the file name and extra field length at the end
+            f.seek(info.header_offset)
+            name_length, extra_length = struct.unpack("<HH", f.read(30)[26:30])
+            offset = info.header_offset + 30 + name_length + extra_length
+            array_dict[os.path.splitext(info.filename)[0]] = _get_member_array(raw, f, offset)
+    return CompiledTask(array_dict, os.path.abspath(path))
+
+def load_task_behavior(task_config_path):
+    """
+    load one task behavior, list of tile behavior
+    """
+    if task_config_path.endswith(COMPILED_SUFFIX):
+        return load_compiled_task(task_config_path)
+    with open(task_config_path, "rb") as f:
+        return pickle.load(f)
+
+def load_task_behavior_list(task_config_path_list, logger=None):
+    """
+    load the task behavior list
+    """
+    task_behavior_list = []
+    for i, task_config_path in enumerate(task_config_path_list):
+        if logger is not None:
+            logger(f"loading {i}th task config from {task_config_path} ")
+        task_behavior_list.append(load_task_behavior(task_config_path))
+    return task_behavior_list
@@ -9,13 +9,13 @@
 @CreateTime:
     2022/04/08 17:00
 """
-import yaml
 
 # read yaml file
 def read_yaml(file_path):
     """
     read yaml file
     """
+    import yaml
     with open(file_path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f.read())
 
@@ -24,5 +24,6 @@ def write_yaml(file_path, data):
     """
     write yaml file
     """
+    import yaml
     with open(file_path, "w", encoding="utf-8") as f:
         yaml.safe_dump(data, f, allow_unicode=True, default_flow_style=False)
@@ -0,0 +1,171 @@
+#-*-coding:utf-8-*-
+"""
+@FileName:
+    conftest.py
+@Description:
+    shared fixtures of the tests, the test config and the run in both engines
+@CreateTime:
+    2026/10/17 03:00
+"""
+import pytest
+from mnsim_noc.Array import BaseArray
+
+def _get_test_config():
+    """
+    get test config
+    """
+    # 2x2 conv, pooling, conv, element_sum, fc
+    # conv1
+    tile_behavior_cfg_conv1 = {
+        "task_id": None,
+        "layer_id": 0,
+        "tile_id": 0,
+        "target_tile_id": [1],
+        "source_tile_id": [-1],
+        "dependence": [
+            {
+                "wait": [[1, 1, 0, 3, 9, 3, None, None, -1, None]],
+                "output": [[0, 0, 0, 3, 9, 3, None, 0, -1, 0]],
+                "drop": [],
+                "latency": 4
+            },
+            {
+                "wait": [[1, 1, 0, 3, 9, 3, None, None, -1, None]],
+                "output": [[0, 1, 0, 3, 9, 3, None, 0, -1, 0]],
+                "drop": [],
+                "latency": 2
+            },
+            {
+                "wait": [[1, 1, 0, 3, 9, 3, None, None, -1, None]],
+                "output": [[1, 0, 0, 3, 9, 3, None, 0, -1, 0]],
+                "drop": [],
+                "latency": 3
+            },
+            {
+                "wait": [[1, 1, 0, 3, 9, 3, None, None, -1, None]],
+                "output": [[1, 1, 0, 3, 9, 3, None, 0, -1, 0]],
+                "drop": [
+                    [0, 0, 0, 3, 9, 3, None, None, -1, None],
+                    [0, 1, 0, 3, 9, 3, None, None, -1, None],
+                    [1, 0, 0, 3, 9, 3, None, None, -1, None],
+                    [1, 1, 0, 3, 9, 3, None, None, -1, None],
+                ],
+                "latency": 7
+            },
+        ]
+    }
+    # pooling1
+    tile_behavior_cfg_pooling1 = {
+        "task_id": None,
+        "layer_id": 1,
+        "tile_id": 1,
+        "target_tile_id": [2, 3],
+        "source_tile_id": [0],
+        "dependence": [
+            {
+                "wait": [
+                    [0, 0, 0, 3, 9, 3, None, 0, -1, 0],
+                    [0, 1, 0, 3, 9, 3, None, 0, -1, 0],
+                    [1, 0, 0, 3, 9, 3, None, 0, -1, 0],
+                    [1, 1, 0, 3, 9, 3, None, 0, -1, 0],
+                ],
+                "output": [[0, 0, 0, 3, 9, 3, None, 1, -1, 1]],
+                "latency": 9,
+                "drop": [
+                    [0, 0, 0, 3, 9, 3, None, 0, -1, 0],
+                    [0, 1, 0, 3, 9, 3, None, 0, -1, 0],
+                    [1, 0, 0, 3, 9, 3, None, 0, -1, 0],
+                    [1, 1, 0, 3, 9, 3, None, 0, -1, 0],
+                ],
+            },
+        ]
+    }
+    # conv2
+    tile_behavior_cfg_conv2 = {
+        "task_id": None,
+        "layer_id": 2,
+        "tile_id": 2,
+        "target_tile_id": [3],
+        "source_tile_id": [1],
+        "dependence": [
+            {
+                "wait": [[0, 0, 0, 3, 9, 3, None, 1, -1, 1]],
+                "output": [[0, 0, 0, 3, 9, 3, None, 2, -1, 2]],
+                "latency": 7,
+                "drop": [[0, 0, 0, 3, 9, 3, None, 1, -1, 1]],
+            },
+        ]
+    }
+    # element_sum
+    tile_behavior_cfg_element_sum = {
+        "task_id": None,
+        "layer_id": 3,
+        "tile_id": 3,
+        "target_tile_id": [4],
+        "source_tile_id": [1, 2],
+        "dependence": [
+            {
+                "wait": [[0, 0, 0, 3, 9, 3, None, 1, -1, 1], [0, 0, 0, 3, 9, 3, None, 2, -1, 2]],
+                "output": [[0, 0, 0, 3, 9, 3, None, 3, -1, 3]],
+                "latency": 6,
+                "drop": [[0, 0, 0, 3, 9, 3, None, 1, -1, 1], [0, 0, 0, 3, 9, 3, None, 2, -1, 2]],
+            },
+        ]
+    }
+    # fc
+    tile_behavior_cfg_fc = {
+        "task_id": None,
+        "layer_id": 4,
+        "tile_id": 4,
+        "target_tile_id": [-1],
+        "source_tile_id": [3],
+        "dependence": [
+            {
+                "wait": [[0, 0, 0, 3, 9, 3, None, 3, -1, 3]],
+                "output": [[0, 0, 0, 3, 9, 3, None, 4, -1, 4]],
+                "latency": 5,
+                "drop": [[0, 0, 0, 3, 9, 3, None, 3, -1, 3]],
+            },
+        ]
+    }
+    return [[tile_behavior_cfg_conv1, tile_behavior_cfg_pooling1,
+        tile_behavior_cfg_conv2, tile_behavior_cfg_element_sum, tile_behavior_cfg_fc
+    ]]
+
+def _run_both_engines(tile_net_shape=(3, 3), **kwargs):
+    """
+    run the test config in the behavior driven and the event driven array,
+    check the same result and return the event driven array
+    """
+    array_result = []
+    for engine in ["behavior_driven", "event_driven"]:
+        array = BaseArray.get_class_(engine)(
+            _get_test_config(), 2, tile_net_shape, (4096, 4096), 1, **kwargs
+        )
+        array.run()
+        array_result.append((
+            array.time_point_list,
+            array.get_latency_throughput(),
+            [tile.computation_range_time for tile in array.tile_list],
+            [
+                communication.communication_range_time
+                for communication in array.communication_list
+            ],
+            array.wire_net.wire_busy_time.tolist(),
+        ))
+    assert array_result[0] == array_result[1]
+    return array
+
+@pytest.fixture(name="get_test_config")
+def get_test_config_fixture():
+    """
+    the function to get a new test config
+    """
+    return _get_test_config
+
+@pytest.fixture(name="run_both_engines")
+def run_both_engines_fixture():
+    """
+    the function to run the test config in both engines and check the same result
+    """
+    return _run_both_engines
@@ -11,129 +11,7 @@
 """
 from mnsim_noc.Array import BaseArray
 
-def get_test_config():
-    """
-    get test config
-    """
-    # 2x2 conv, pooling, conv, element_sum, fc
-    # conv1
-    tile_behavior_cfg_conv1 = {
-        "task_id": None,
-        "layer_id": 0,
-        "tile_id": 0,
-        "target_tile_id": [1],
-        "source_tile_id": [-1],
-        "dependence": [
-            {
-                "wait": [[1, 1, 0, 3, 9, 3, None, None, -1, None]],
-                "output": [[0, 0, 0, 3, 9, 3, None, 0, -1, 0]],
-                "drop": [],
-                "latency": 4
-            },
-            {
-                "wait": [[1, 1, 0, 3, 9, 3, None, None, -1, None]],
-                "output": [[0, 1, 0, 3, 9, 3, None, 0, -1, 0]],
-                "drop": [],
-                "latency": 2
-            },
-            {
-                "wait": [[1, 1, 0, 3, 9, 3, None, None, -1, None]],
-                "output": [[1, 0, 0, 3, 9, 3, None, 0, -1, 0]],
-                "drop": [],
-                "latency": 3
-            },
-            {
-                "wait": [[1, 1, 0, 3, 9, 3, None, None, -1, None]],
-                "output": [[1, 1, 0, 3, 9, 3, None, 0, -1, 0]],
-                "drop": [
-                    [0, 0, 0, 3, 9, 3, None, None, -1, None],
-                    [0, 1, 0, 3, 9, 3, None, None, -1, None],
-                    [1, 0, 0, 3, 9, 3, None, None, -1, None],
-                    [1, 1, 0, 3, 9, 3, None, None, -1, None],
-                ],
-                "latency": 7
-            },
-        ]
-    }
-    # pooling1
-    tile_behavior_cfg_pooling1 = {
-        "task_id": None,
-        "layer_id": 1,
-        "tile_id": 1,
-        "target_tile_id": [2, 3],
-        "source_tile_id": [0],
-        "dependence": [
-            {
-                "wait": [
-                    [0, 0, 0, 3, 9, 3, None, 0, -1, 0],
-                    [0, 1, 0, 3, 9, 3, None, 0, -1, 0],
-                    [1, 0, 0, 3, 9, 3, None, 0, -1, 0],
-                    [1, 1, 0, 3, 9, 3, None, 0, -1, 0],
-                ],
-                "output": [[0, 0, 0, 3, 9, 3, None, 1, -1, 1]],
-                "latency": 9,
-                "drop": [
-                    [0, 0, 0, 3, 9, 3, None, 0, -1, 0],
-                    [0, 1, 0, 3, 9, 3, None, 0, -1, 0],
-                    [1, 0, 0, 3, 9, 3, None, 0, -1, 0],
-                    [1, 1, 0, 3, 9, 3, None, 0, -1, 0],
-                ],
-            },
-        ]
-    }
-    # conv2
-    tile_behavior_cfg_conv2 = {
-        "task_id": None,
-        "layer_id": 2,
-        "tile_id": 2,
-        "target_tile_id": [3],
-        "source_tile_id": [1],
-        "dependence": [
-            {
-                "wait": [[0, 0, 0, 3, 9, 3, None, 1, -1, 1]],
-                "output": [[0, 0, 0, 3, 9, 3, None, 2, -1, 2]],
-                "latency": 7,
-                "drop": [[0, 0, 0, 3, 9, 3, None, 1, -1, 1]],
-            },
-        ]
-    }
-    # element_sum
-    tile_behavior_cfg_element_sum = {
-        "task_id": None,
-        "layer_id": 3,
-        "tile_id": 3,
-        "target_tile_id": [4],
-        "source_tile_id": [1, 2],
-        "dependence": [
-            {
-                "wait": [[0, 0, 0, 3, 9, 3, None, 1, -1, 1], [0, 0, 0, 3, 9, 3, None, 2, -1, 2]],
-                "output": [[0, 0, 0, 3, 9, 3, None, 3, -1, 3]],
-                "latency": 6,
-                "drop": [[0, 0, 0, 3, 9, 3, None, 1, -1, 1], [0, 0, 0, 3, 9, 3, None, 2, -1, 2]],
-            },
-        ]
-    }
-    # fc
-    tile_behavior_cfg_fc = {
-        "task_id": None,
-        "layer_id": 4,
-        "tile_id": 4,
-        "target_tile_id": [-1],
-        "source_tile_id": [3],
-        "dependence": [
-            {
-                "wait": [[0, 0, 0, 3, 9, 3, None, 3, -1, 3]],
-                "output": [[0, 0, 0, 3, 9, 3, None, 4, -1, 4]],
-                "latency": 5,
-                "drop": [[0, 0, 0, 3, 9, 3, None, 3, -1, 3]],
-            },
-        ]
-    }
-    return [[tile_behavior_cfg_conv1, tile_behavior_cfg_pooling1,
-        tile_behavior_cfg_conv2, tile_behavior_cfg_element_sum, tile_behavior_cfg_fc
-    ]]
-
-def test_array():
+def test_array(get_test_config):
     """
     test array in behavior driven
     """
@@ -145,3 +23,210 @@ def test_array():
     )
     array.run()
     array.show_simulation_result()
+
+def test_event_array(run_both_engines):
+    """
+    test event driven array, the same result as the behavior driven array
+    """
+    run_both_engines(mapping_strategy="snake", transparent_flag=False)
+
+def test_wire_config(run_both_engines):
+    """
+    test the pipelined link model, faster than the summed one, the same in both engines
+    """
+    end_time_list = []
+    for wire_config in [None, {"link_model": "pipelined", "router_delay": 0.5}]:
+        array = run_both_engines(mapping_strategy="snake", wire_config=wire_config)
+        end_time_list.append(array.time_point_list[-1])
+    assert end_time_list[1] < end_time_list[0]
+    # one block of 3x9 from (0, 0) to (0, 1), router_delay * hops + size / min_bw
+    communication = array.communication_list[0]
+    assert (communication.input_tile.position, communication.output_tile.position) == \
+        ((0, 0), (0, 1))
+    start_time, end_time = communication.communication_range_time[0]
+    assert end_time - start_time == 0.5 * 1 + 3 * 9 / 1
+
+def test_multicast_array(run_both_engines, monkeypatch):
+    """
+    test the multicast communication, one send for the tile with two targets
+    the same result in both engines, the same received data and less wire load
+    """
+    from collections import Counter
+    from mnsim_noc.Buffer import MultiInputBuffer
+    received_data = {}
+    add_data_list = MultiInputBuffer.add_data_list
+    def record_add_data_list(self, data_list, source_tile_id):
+        received_data.setdefault(self, Counter()).update(
+            (source_tile_id, tuple(data)) for data in data_list
+        )
+        add_data_list(self, data_list, source_tile_id)
+    monkeypatch.setattr(MultiInputBuffer, "add_data_list", record_add_data_list)
+    wire_busy_time_list = []
+    tile_received_data_list = []
+    for multicast_flag in [False, True]:
+        # in one row, the two targets share the first wire
+        array = run_both_engines((1, 5), multicast_flag=multicast_flag)
+        assert len(array.communication_list) == (4 if multicast_flag else 5)
+        wire_busy_time_list.append(array.wire_net.wire_busy_time.sum())
+        tile_received_data_list.append([
+            received_data.get(tile.input_buffer, Counter()) for tile in array.tile_list
+        ])
+    assert wire_busy_time_list[1] < wire_busy_time_list[0]
+    assert tile_received_data_list[0] == tile_received_data_list[1]
+    # the two targets of the multicast tile both receive its data
+    assert all(len(tile_received_data_list[1][i]) > 0 for i in [2, 3])
+
+def test_sweep(tmp_path):
+    """
+    test sweep on the grid
+    """
+    from mnsim_noc.sweep import run_sweep
+    output = str(tmp_path / "sweep_result.csv")
+    sweep_config = {
+        "base": {"image_num": 2, "task_config_path_list": ["examples/test.pkl"]},
+        "grid": {"band_width": [1, 2], "tile_net_shape": [[3, 3], [4, 4]]},
+    }
+    table = run_sweep(sweep_config, 2, output)
+    assert len(table) == 4
+    assert all(row["error"] == "" for row in table)
+    # the same as the single run
+    table_serial = run_sweep(sweep_config, 1)
+    assert [row["latency"] for row in table] == [row["latency"] for row in table_serial]
+    with open(output, "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == 5
+
+def test_statistics_array(get_test_config):
+    """
+    test the statistics mode, the same result without the range lists
+    """
+    result_list = []
+    for statistics_flag in [False, True]:
+        array = BaseArray(get_test_config(), 2, (3, 3), (4096, 4096), 1,
+            "naive", "naive", False, None, statistics_flag
+        )
+        array.run()
+        end_time = array.time_point_list[-1]
+        result_list.append((
+            array.get_latency_throughput(),
+            [tile.get_running_rate(end_time) for tile in array.tile_list],
+            [
+                communication.get_running_rate(end_time)
+                for communication in array.communication_list
+            ],
+            [tile.computation_statistics.get_histogram() for tile in array.tile_list],
+        ))
+        if statistics_flag:
+            assert len(array.time_point_list) == 1
+            assert all(len(tile.computation_range_time) == 0 for tile in array.tile_list)
+            assert all(
+                len(communication.communication_range_time) == 0
+                for communication in array.communication_list
+            )
+        else:
+            for tile in array.tile_list:
+                assert tile.computation_statistics.count == len(tile.computation_range_time)
+    assert result_list[0] == result_list[1]
+
+def test_checkpoint_resume(get_test_config, tmp_path, monkeypatch):
+    """
+    test the checkpoint and resume, the same result as the run without interruption
+    """
+    class PreemptError(Exception):
+        """
+        preempt after some checkpoints
+        """
+    save_checkpoint = BaseArray.save_checkpoint
+    def preempt_save_checkpoint(self, checkpoint_path=None):
+        save_checkpoint(self, checkpoint_path)
+        if len(self.time_point_list) >= 6:
+            raise PreemptError()
+    monkeypatch.setattr(BaseArray, "save_checkpoint", preempt_save_checkpoint)
+    from mnsim_noc.utils.trace import get_trace_sink
+    for engine in ["behavior_driven", "event_driven"]:
+        result_list = []
+        for preempt in [False, True]:
+            array = BaseArray.get_class_(engine)(get_test_config(), 2, (3, 3), (4096, 4096), 1)
+            trace_path = str(tmp_path / f"{engine}_{preempt}.csv")
+            array.set_trace_sink(get_trace_sink(trace_path))
+            if preempt:
+                checkpoint_path = str(tmp_path / f"{engine}.ckpt")
+                array.set_checkpoint(checkpoint_path, 0.)
+                try:
+                    array.run()
+                    assert False, "should be preempted"
+                except PreemptError:
+                    pass
+                array.trace_sink.file.close()
+                array = BaseArray.load_checkpoint(checkpoint_path)
+                assert array.time_point_list[-1] > 0 and array.run_state is not None
+                array.checkpoint_path = None
+            array.run()
+            array.trace_sink.close()
+            with open(trace_path, "r", encoding="utf-8") as f:
+                trace = f.read()
+            result_list.append((
+                array.time_point_list,
+                [tile.computation_range_time for tile in array.tile_list],
+                [
+                    communication.communication_range_time
+                    for communication in array.communication_list
+                ],
+                array.get_latency_throughput(),
+                trace,
+            ))
+        assert result_list[0] == result_list[1]
+
+def test_resume_trace(tmp_path):
+    """
+    test the resume with a new trace is refused, the trace of the checkpoint run is kept
+    """
+    from click.testing import CliRunner
+    from mnsim_noc.main import main
+    trace_path = tmp_path / "trace.json"
+    trace_path.write_text("[\n", encoding="utf-8")
+    result = CliRunner().invoke(
+        main, ["--resume", str(tmp_path / "run.ckpt"), "--trace", str(trace_path)]
+    )
+    assert result.exit_code == 2
+    assert "--trace can not be used with --resume" in result.output
+    assert trace_path.read_text(encoding="utf-8") == "[\n"
+
+def test_dirty_propagation(get_test_config):
+    """
+    test the wake up of the event driven array, the buffer and the wire changes
+    only mark the dependant tiles and communications dirty
+    """
+    array = BaseArray.get_class_("event_driven")(get_test_config(), 1, (1, 5), (4096, 4096), 1)
+    array._init_run_state()
+    update_module = array.run_state["update_module"]
+    dirty_module = array.run_state["dirty_module"]
+    schedule = array.schedule_strategy
+    while len(dirty_module) > 0:
+        dirty_module.pop()
+    schedule.dirty_communication.clear()
+    # the communication from tile 0 to tile 1
+    communication = schedule.communication_list[0]
+    data = [0, 0, 0, 3, 9, 3, 0, 0, -1, 0]
+    # new data in the output buffer, only the outgoing communication
+    communication.output_buffer.add_data_list([data])
+    assert schedule.dirty_communication == {0}
+    # new data in the input buffer, only the target tile
+    communication.input_buffer.add_transfer_data_list([data], communication.source_tile_id)
+    communication.input_buffer.add_data_list([data], communication.source_tile_id)
+    assert [update_module[i] for i in dirty_module.flag] == [communication.output_tile]
+    # released space in the input buffer, only the incoming communication
+    schedule.dirty_communication.clear()
+    communication.input_buffer.delete_data_list([data])
+    assert schedule.dirty_communication == {0}
+    # ready but blocked by the busy wire, woken only when the wire is released
+    wire_index = schedule.route_list[0].wire_index
+    array.wire_net.set_data_path_state(wire_index, True, "test", 0.)
+    schedule.schedule(0.)
+    assert len(schedule.dirty_communication) == 0
+    assert all(0 in schedule.waiting_communication[i] for i in wire_index.tolist())
+    schedule.wake_up_waiting_communication()
+    assert len(schedule.dirty_communication) == 0
+    array.wire_net.set_data_path_state(wire_index, False, "test", 1.)
+    schedule.wake_up_waiting_communication()
+    assert schedule.dirty_communication == {0}
+    assert schedule.schedule(1.) == [0]
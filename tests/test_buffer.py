@@ -54,3 +54,107 @@ def test_buffer():
     # communication start, delete
     output_buffer.delete_data_list(data_list[0:1])
     # communication end, nothing
+
+def test_data_block():
+    """
+    test the interned data block
+    """
+    import pickle
+    from mnsim_noc.Buffer import get_data_block
+    data = [0, 1, 0, 3, 9, 3, 0, 0, -1, 0]
+    data_block = get_data_block(data)
+    assert data_block is get_data_block(tuple(data))
+    assert data_block is pickle.loads(pickle.dumps(data_block))
+    assert data_block == data and data_block.size == 27
+    assert data_block[9] == 0 and len(data_block) == 10
+
+def test_output_buffer_order():
+    """
+    test the FIFO order of the output buffer, with the same data
+    """
+    data_a = [0, 0, 0, 3, 9, 3, 0, 0, -1, 0]
+    data_b = [0, 1, 0, 3, 9, 3, 0, 0, -1, 0]
+    output_buffer = OutputBuffer(256)
+    output_buffer.add_data_list([data_b, data_a, data_a])
+    output_buffer.delete_data_list([data_a])
+    assert output_buffer.next_transfer_data() == [data_b]
+    output_buffer.delete_data_list([data_b])
+    assert output_buffer.next_transfer_data() == [data_a]
+    assert output_buffer.used_space == 27
+    output_buffer.delete_data_list([data_a])
+    assert output_buffer.next_transfer_data() is None
+    output_buffer.check_finish()
+
+def test_input_buffer_ready():
+    """
+    test the readiness tracker of the input buffer
+    """
+    data_list = [
+        [0, 0, 0, 3, 9, 3, 0, 0, -1, 0],
+        [0, 1, 0, 3, 9, 3, 0, 0, -1, 0],
+    ]
+    input_buffer = InputBuffer(256)
+    input_buffer.add_transfer_data_list(data_list)
+    assert not input_buffer.check_data_already(data_list)
+    input_buffer.add_data_list(data_list[0:1])
+    assert input_buffer.wait_missing_number == 1
+    input_buffer.add_data_list(data_list[1:2])
+    assert input_buffer.check_data_already(data_list)
+    input_buffer.delete_data_list(data_list[0:1])
+    assert not input_buffer.check_data_already(data_list)
+
+def test_multi_output_buffer_shared():
+    """
+    test the shared data of the multi output buffer, each target keeps its own budget
+    """
+    from mnsim_noc.Buffer import MultiOutputBuffer
+    data_a = [0, 0, 0, 3, 9, 3, 0, 0, -1, 0]
+    data_b = [0, 1, 0, 3, 9, 3, 0, 0, -1, 0]
+    output_buffer = MultiOutputBuffer(60, [1, 2])
+    output_buffer.add_data_list([data_a, data_b])
+    # stored once for two targets
+    assert output_buffer.used_space == 54 and output_buffer.target_used_space == [54, 54]
+    output_buffer.delete_data_list([data_a], 1)
+    assert output_buffer.next_transfer_data(1) == [data_b]
+    assert output_buffer.next_transfer_data(2) == [data_a]
+    assert output_buffer.used_space == 54
+    # the budget of the target 2 is still full
+    assert not output_buffer.check_enough_space([data_a])
+    output_buffer.delete_data_list([data_a], 2)
+    assert output_buffer.used_space == 27 and output_buffer.check_enough_space([data_a])
+    output_buffer.delete_data_list([data_b], 1)
+    output_buffer.delete_data_list([data_b], 2)
+    assert output_buffer.next_transfer_data(1) is None
+    output_buffer.check_finish()
+
+def test_multi_output_buffer_space():
+    """
+    test the stored space and the max target space are the same as counting the copies
+    """
+    import random
+    from mnsim_noc.Buffer import MultiOutputBuffer
+    random.seed(0)
+    data_list = [[0, i, 0, 3, 9, 3, 0, 0, -1, 0] for i in range(4)]
+    output_buffer = MultiOutputBuffer(float("inf"), [1, 2, 3])
+    # kept copies of each target
+    kept_list = [[] for _ in range(3)]
+    for _ in range(400):
+        if random.random() < 0.4:
+            data = random.choice(data_list)
+            output_buffer.add_data_list([data])
+            for kept in kept_list:
+                kept.append(data)
+        else:
+            i = random.randrange(3)
+            if len(kept_list[i]) == 0:
+                continue
+            # the first same data is deleted
+            data = random.choice(kept_list[i])
+            kept_list[i].remove(data)
+            output_buffer.delete_data_list([data], i + 1)
+        assert output_buffer.used_space == 27 * sum(
+            max(kept.count(data) for kept in kept_list) for data in data_list
+        )
+        assert output_buffer.max_used_space == 27 * max(len(kept) for kept in kept_list)
+        for i, kept in enumerate(kept_list):
+            assert output_buffer.next_transfer_data(i + 1) == (kept[:1] or None)
@@ -0,0 +1,174 @@
+#-*-coding:utf-8-*-
+"""
+@FileName:
+    test_mapping.py
+@Description:
+    test mapping strategy
+@CreateTime:
+    2026/10/17 01:30
+"""
+import numpy as np
+import pytest
+from mnsim_noc.Array import BaseArray
+from mnsim_noc.Wire import WireNet
+from mnsim_noc.Strategy.mapping import CommunicationWiseMapping, MappingPopulation, \
+    get_non_dominated_rank, get_crowding_distance, OBJECTIVE_NAME_LIST
+
+def test_mapping_population():
+    """
+    test the vectorized population
+    """
+    source = np.array([0, 1, 2, 0], dtype=np.int64)
+    target = np.array([1, 2, 3, 3], dtype=np.int64)
+    weight = np.array([4., 3., 2., 1.])
+    population = MappingPopulation((3, 3), 5, source, target, weight, seed=0)
+    position = population.random_init(16)
+    child_list = [
+        population.mutation_exchange(position), population.mutation_reverse(position),
+        population.mutation_insert(position), population.mutation_remap(position),
+        population.mutation(position, 0.7), population.crossover(position, position[::-1], 0.9),
+    ]
+    for pos in [position] + child_list:
+        assert pos.shape == (16, 5, 2)
+        assert ((pos >= 0) & (pos < 3)).all()
+        # no two tiles on the same cell
+        cell = pos[:, :, 0] * 3 + pos[:, :, 1]
+        assert all(len(set(row)) == 5 for row in cell.tolist())
+        # the same as the loop
+        total_comm = population.get_total_comm(pos)
+        for i in range(16):
+            assert total_comm[i] == sum(
+                w * np.abs(pos[i, s] - pos[i, t]).sum()
+                for s, t, w in zip(source, target, weight)
+            )
+        # max link load on the XY routing
+        max_link_load = population.get_max_link_load(pos)
+        for i in range(16):
+            wire_net = WireNet((3, 3), 1)
+            link_load = np.zeros(len(wire_net.wire_position_list))
+            for s, t, w in zip(source, target, weight):
+                route = wire_net.get_route(tuple(pos[i, s]), tuple(pos[i, t]))
+                link_load[route.wire_index] += w
+            assert max_link_load[i] == link_load.max()
+
+def test_mapping_population_large_mesh():
+    """
+    test the population on the mesh with more than 32767 cells
+    """
+    source = np.array([0], dtype=np.int64)
+    target = np.array([1], dtype=np.int64)
+    population = MappingPopulation((256, 256), 2, source, target, np.array([1.]), seed=0)
+    assert (population.cell_row[-1], population.cell_column[-1]) == (255, 255)
+    position = population.random_init(4)
+    assert ((position >= 0) & (position < 256)).all()
+    # the target is on the nearest free cell of the source
+    assert (np.abs(position[:, 0] - position[:, 1]).sum(axis=1) == 1).all()
+
+def test_non_dominated_sort():
+    """
+    test the non-dominated rank and the crowding distance
+    """
+    objective = np.array([[1., 4.], [2., 2.], [4., 1.], [3., 3.], [4., 4.], [2., 2.]])
+    rank = get_non_dominated_rank(objective)
+    assert rank.tolist() == [0, 0, 0, 1, 2, 0]
+    distance = get_crowding_distance(objective, rank)
+    assert np.isinf(distance[[0, 2, 3, 4]]).all()
+    assert np.isfinite(distance[[1, 5]]).all()
+    # the same value on the second objective, only the boundary is inf
+    objective = np.array([[1., 2.], [2., 2.], [3., 2.], [5., 2.]])
+    distance = get_crowding_distance(objective, np.zeros(4, dtype=np.int64))
+    assert np.isinf(distance[[0, 3]]).all()
+    assert distance[1:3].tolist() == [0.5, 0.75]
+
+def test_commwise_search(get_test_config):
+    """
+    test the nearest free cell and the best point of commwise, the same as the scan
+    """
+    mapping = CommunicationWiseMapping(get_test_config(), 1, (4, 5), (4096, 4096), 1)
+    mapping._init_cell_state()
+    rng = np.random.default_rng(0)
+    position_list = [None]*8
+    for tile, loc in enumerate(rng.choice(20, 8, replace=False).tolist()):
+        mapping._set_position(position_list, tile, (loc // 5, loc % 5))
+    for pos in position_list:
+        # the diamond scan order
+        nearest_pos = None
+        for distance in range(1, 8):
+            for loc in [(i+pos[0], distance-abs(i)+pos[1]) for i in range(-distance, distance)] + \
+                [(i+pos[0], abs(i)-distance+pos[1]) for i in range(distance, -distance, -1)]:
+                if 0 <= loc[0] < 4 and 0 <= loc[1] < 5 and loc not in position_list:
+                    nearest_pos = loc
+                    break
+            if nearest_pos is not None:
+                break
+        assert mapping.get_nearest_pos(pos) == nearest_pos
+    # the most open point
+    distance_list = [
+        (min([4-row, row+1, 5-column, column+1] + \
+            [abs(pos[0]-row)+abs(pos[1]-column) for pos in position_list]), (row, column))
+        for row in range(4) for column in range(5)
+    ]
+    best_distance = max(distance for distance, _ in distance_list)
+    assert mapping.get_best_point() == \
+        [loc for distance, loc in distance_list if distance == best_distance][0]
+
+def test_nsga2_mapping(get_test_config):
+    """
+    test nsga2 mapping, in this process and on the process pool
+    """
+    for worker_num in [0, 2]:
+        mapping_config = {
+            "population_size": 8, "generation_num": 4, "worker_num": worker_num, "seed": 0
+        }
+        array = BaseArray(get_test_config(), 2, (3, 3), (4096, 4096), 1,
+            "nsga2", "naive", False, mapping_config
+        )
+        array.run()
+        assert array.get_latency_throughput()[0]["latency"] > 0
+        pareto_front = array.mapping_strategy.pareto_front
+        assert len(pareto_front) > 0
+        objective_list = [
+            tuple(front[name] for name in OBJECTIVE_NAME_LIST) for front in pareto_front
+        ]
+        assert len(set(objective_list)) == len(objective_list)
+        assert [tile.position for tile in array.tile_list] in \
+            [front["position_list"] for front in pareto_front]
+
+def test_nsga2_objective(get_test_config):
+    """
+    test the unknown objective name
+    """
+    mapping_config = {"population_size": 8, "generation_num": 1, "objective": "hops"}
+    with pytest.raises(ValueError, match="unknown objective hops"):
+        BaseArray(get_test_config(), 2, (3, 3), (4096, 4096), 1,
+            "nsga2", "naive", False, mapping_config
+        )
+
+def test_surrogate_mapping(get_test_config):
+    """
+    test surrogate mapping, the chosen mapping is the best simulated one,
+    the candidates are simulated with the settings of the array
+    """
+    mapping_config = {
+        "population_size": 8, "generation_num": 4, "seed": 0, "simulation_num": 3
+    }
+    wire_config = {"link_model": "pipelined", "router_delay": 0.5}
+    array = BaseArray(get_test_config(), 2, (3, 3), (4096, 4096), 1,
+        "surrogate", "adaptive", False, mapping_config, wire_config=wire_config
+    )
+    assert array.mapping_strategy.array_config["schedule_strategy"] == "adaptive"
+    assert array.mapping_strategy.array_config["wire_config"] == wire_config
+    array.run()
+    candidate_result = array.mapping_strategy.candidate_result
+    assert len(candidate_result) == 3
+    best = min(candidate_result, key=lambda s: s["simulation_time"])
+    assert [tile.position for tile in array.tile_list] == best["position_list"]
+    # the given mapping gets the same simulation time
+    given_array = BaseArray(get_test_config(), 2, (3, 3), (4096, 4096), 1,
+        "given", "adaptive", False, {"position_list": best["position_list"]},
+        wire_config=wire_config
+    )
+    given_array.run()
+    assert max(
+        result["total_time"] for result in given_array.get_latency_throughput().values()
+    ) == best["simulation_time"]
@@ -0,0 +1,147 @@
+#-*-coding:utf-8-*-
+"""
+@FileName:
+    test_schedule.py
+@Description:
+    test schedule, the vectorized allocation, the adaptive routes, the priority order
+    and the wormhole packets
+@CreateTime:
+    2026/10/17 00:40
+"""
+import random
+from types import SimpleNamespace
+import numpy as np
+from mnsim_noc.Array import BaseArray
+from mnsim_noc.Wire import WireNet
+from mnsim_noc.Strategy import NaiveSchedule, AdaptiveSchedule, MinimalPathSchedule, \
+    CriticalSchedule, AgeSchedule
+
+def test_greedy_allocation():
+    """
+    test the vectorized greedy allocation is the same as one by one
+    """
+    random.seed(0)
+    wire_net = WireNet((4, 4), 1)
+    position_list = [(i, j) for i in range(4) for j in range(4)]
+    communication_list = []
+    for _ in range(40):
+        start_position, end_position = random.sample(position_list, 2)
+        communication_list.append(SimpleNamespace(
+            input_tile=SimpleNamespace(position=start_position),
+            output_tile=SimpleNamespace(position=end_position),
+        ))
+    schedule = NaiveSchedule(communication_list, wire_net)
+    wire_net.wire_state[random.sample(range(len(wire_net.wire_state)), 3)] = True
+    for _ in range(20):
+        communication_order = np.array(random.sample(range(40), 15))
+        granted = schedule._get_greedy_allocation(communication_order)
+        # one by one
+        wire_state = wire_net.wire_state.copy()
+        for i, granted_flag in zip(communication_order, granted):
+            wire_index = schedule.route_list[i].wire_index
+            assert granted_flag == (not wire_state[wire_index].any())
+            if granted_flag:
+                wire_state[wire_index] = True
+
+def test_adaptive_schedule(run_both_engines):
+    """
+    test the adaptive and minimal path schedules, the same result in both engines
+    """
+    for schedule_strategy in ["adaptive", "minimal"]:
+        run_both_engines(mapping_strategy="snake", schedule_strategy=schedule_strategy)
+
+def test_adaptive_route():
+    """
+    test the adaptive and minimal path schedules take the other route
+    when the XY route is occupied or loaded
+    """
+    communication_list = [SimpleNamespace(
+        input_tile=SimpleNamespace(position=(0, 0)),
+        output_tile=SimpleNamespace(position=(2, 2)),
+        transfer_data=[],
+    )]
+    for schedule_class in [AdaptiveSchedule, MinimalPathSchedule]:
+        wire_net = WireNet((4, 4), 1)
+        schedule = schedule_class(communication_list, wire_net)
+        xy_route, yx_route = schedule.candidate_route_list[0][:2]
+        # the first hop of the XY route is occupied
+        wire_net.wire_state[xy_route.wire_index[0]] = True
+        transfer_path_list, _ = schedule._get_transfer_path_list([0])
+        assert transfer_path_list[0] is yx_route.wire_index
+        # the last hop of the YX route is occupied too, only the other minimal routes
+        wire_net.wire_state[yx_route.wire_index[-1]] = True
+        transfer_path_list, _ = schedule._get_transfer_path_list([0])
+        if schedule_class is AdaptiveSchedule:
+            assert transfer_path_list[0] is None
+        else:
+            wire_index = transfer_path_list[0]
+            assert len(wire_index) == 4 and not wire_net.wire_state[wire_index].any()
+        # all idle, the XY route is loaded
+        wire_net.wire_state[:] = False
+        wire_net.wire_busy_time[xy_route.wire_index] = 10.
+        transfer_path_list, _ = schedule._get_transfer_path_list([0])
+        assert transfer_path_list[0] is yx_route.wire_index
+
+def test_priority_schedule(run_both_engines):
+    """
+    test the priority schedules, the same result in both engines
+    and the critical priority is lower for the communication to the earlier layer
+    """
+    for schedule_strategy in ["critical", "starvation", "age"]:
+        array = run_both_engines(mapping_strategy="snake", schedule_strategy=schedule_strategy)
+        if schedule_strategy == "critical":
+            schedule = array.schedule_strategy
+            for i, communication in enumerate(schedule.communication_list):
+                for j, next_communication in enumerate(schedule.communication_list):
+                    if next_communication.input_tile is communication.output_tile:
+                        assert schedule.communication_priority[i] < \
+                            schedule.communication_priority[j]
+
+def test_priority_conflict():
+    """
+    test the priority communication wins the wire conflict against the index order,
+    and the age schedule ends the starvation of the old image
+    """
+    def get_communication(start_position, end_position, latency, image_id):
+        output_tile = SimpleNamespace(
+            position=end_position, dependence_list=[{"latency": latency}]
+        )
+        return SimpleNamespace(
+            input_tile=SimpleNamespace(position=start_position, dependence_list=[]),
+            output_tile=output_tile, output_tile_list=[output_tile],
+            transfer_data=[[0, 0, 0, 3, 9, 3, image_id, 0, 0, 0]],
+        )
+    # both communications use the wire (0, 1) -> (0, 2)
+    communication_list = [
+        get_communication((0, 0), (0, 2), 1, 2), get_communication((0, 1), (0, 3), 10, 1)
+    ]
+    for schedule_class, granted_index in [
+        (NaiveSchedule, 0), (CriticalSchedule, 1), (AgeSchedule, 1)
+    ]:
+        schedule = schedule_class(communication_list, WireNet((4, 4), 1))
+        transfer_path_list, _ = schedule._get_transfer_path_list([0, 1])
+        assert [path is not None for path in transfer_path_list] == \
+            [i == granted_index for i in range(2)]
+    # the first communication is ready with a new image in each round
+    for schedule_class, granted_round in [(NaiveSchedule, None), (AgeSchedule, 2)]:
+        schedule = schedule_class(communication_list, WireNet((4, 4), 1))
+        first_granted_round = None
+        for image_id in range(5):
+            communication_list[0].transfer_data[0][6] = image_id
+            transfer_path_list, _ = schedule._get_transfer_path_list([0, 1])
+            if transfer_path_list[1] is not None:
+                first_granted_round = image_id
+                break
+        assert first_granted_round == granted_round
+
+def test_wormhole_schedule(get_test_config, run_both_engines):
+    """
+    test the wormhole schedule, the same result in both engines and faster than the circuit
+    """
+    wormhole_array = run_both_engines(
+        mapping_strategy="snake", schedule_strategy="wormhole",
+        packet_config={"packet_size": 8, "vc_num": 2, "queue_depth": 2}
+    )
+    array = BaseArray(get_test_config(), 2, (3, 3), (4096, 4096), 1, mapping_strategy="snake")
+    array.run()
+    assert wormhole_array.time_point_list[-1] <= array.time_point_list[-1]
@@ -0,0 +1,50 @@
+#-*-coding:utf-8-*-
+"""
+@FileName:
+    test_startup.py
+@Description:
+    test the cli cold start, no heavy import at the import time
+@CreateTime:
+    2026/10/17 02:10
+"""
+import os
+import subprocess
+import sys
+
+# generous bound for the cold start, the heavy import takes seconds
+STARTUP_TIME_LIMIT = 2.
+
+def _run_python(code):
+    """
+    run the code in a new python process, return the stdout
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))] + \
+        ([env["PYTHONPATH"]] if "PYTHONPATH" in env else [])
+    )
+    return subprocess.run(
+        [sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True
+    ).stdout
+
+def test_startup():
+    """
+    test the import time and the loaded modules of the cli
+    """
+    output = _run_python(
+        "import sys, time\n"
+        "start_time = time.perf_counter()\n"
+        "import mnsim_noc.main\n"
+        "print(time.perf_counter() - start_time)\n"
+        "print(','.join(sorted(sys.modules)))\n"
+    )
+    import_time, module_list = output.strip().split("\n")
+    module_list = module_list.split(",")
+    for module in ["torch", "yaml", "concurrent.futures.process"]:
+        assert module not in module_list, f"{module} is imported at the startup"
+    assert float(import_time) < STARTUP_TIME_LIMIT
+    # help works without the config
+    assert "sweep" in _run_python(
+        "from mnsim_noc.main import main\n"
+        "main(['--help'], standalone_mode=False)\n"
+    )
@@ -9,6 +9,7 @@
 @CreateTime:
     2022/05/07 14:51
 """
+import pytest
 from mnsim_noc.Tile import BaseTile
 
 def test_tile():
@@ -65,3 +66,58 @@ def test_tile():
         if current_time == float("inf"):
             break
     print(tile.get_computation_range())
+
+def test_tile_computation():
+    """
+    test the computation is generated on demand with the image id
+    """
+    tile_behavior_cfg = {
+        "task_id": 0,
+        "layer_id": 0,
+        "tile_id": 0,
+        "target_tile_id": [-1],
+        "source_tile_id": [-1],
+        "dependence": [
+            {
+                "wait": [[0, 0, 0, 3, 9, 3, None, None, -1, None]],
+                "output": [[0, 0, 0, 3, 9, 3, None, 0, -1, 0]],
+                "drop": [],
+                "latency": 1
+            },
+        ]
+    }
+    tile = BaseTile((0, 0), 1000, (4096, 4096), tile_behavior_cfg)
+    assert tile.computation_number == 1000
+    computation = tile._get_computation(999)
+    assert computation["output"] == [[0, 0, 0, 3, 9, 3, 999, 0, -1, 0]]
+    assert tile.tile_behavior_cfg["dependence"][0]["output"][0][6] is None
+
+def test_tile_statistics():
+    """
+    test the tile in the statistics mode, no range list
+    """
+    tile_behavior_cfg = {
+        "task_id": 0,
+        "layer_id": 0,
+        "tile_id": 0,
+        "target_tile_id": [-1],
+        "source_tile_id": [-1],
+        "dependence": [
+            {
+                "wait": [],
+                "output": [[0, 0, 0, 3, 9, 3, None, 0, -1, 0]],
+                "drop": [],
+                "latency": 3
+            },
+        ]
+    }
+    tile = BaseTile((0, 0), 2, (4096, 4096), tile_behavior_cfg)
+    tile.set_statistics_flag(True)
+    current_time = 0
+    while current_time != float("inf"):
+        tile.update(current_time)
+        current_time = tile.get_computation_end_time()
+    assert tile.computation_statistics.count == 2
+    assert tile.computation_statistics.busy_time == 6
+    with pytest.raises(AssertionError, match="statistics mode"):
+        tile.get_computation_range()
@@ -0,0 +1,56 @@
+#-*-coding:utf-8-*-
+"""
+@FileName:
+    test_trace.py
+@Description:
+    test the streaming trace sink
+@CreateTime:
+    2026/10/17 03:00
+"""
+import csv
+import json
+from mnsim_noc.Array import BaseArray
+from mnsim_noc.utils.trace import get_trace_sink
+
+def test_trace_sink(get_test_config, tmp_path):
+    """
+    test the csv and chrome trace, the events are the same as the range lists
+    """
+    for file_name in ["trace.csv", "trace.json"]:
+        path = str(tmp_path / file_name)
+        array = BaseArray(get_test_config(), 2, (3, 3), (4096, 4096), 1)
+        trace_sink = get_trace_sink(path, chunk_size=4)
+        array.set_trace_sink(trace_sink)
+        array.run()
+        trace_sink.close()
+        # events from the range lists
+        tile_event = sorted(
+            (start, end) for tile in array.tile_list for start, end in tile.computation_range_time
+        )
+        communication_event = sorted(
+            (start, end) for communication in array.communication_list
+            for start, end in communication.communication_range_time
+        )
+        # read the trace
+        event_list = []
+        if file_name.endswith(".csv"):
+            with open(path, "r", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    event_list.append((row["category"], float(row["start"]), float(row["end"])))
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                for event in json.load(f):
+                    if event["ph"] == "X":
+                        event_list.append((
+                            event["cat"], event["ts"] * 1e3, (event["ts"] + event["dur"]) * 1e3
+                        ))
+        for category, target_event in [
+            ("tile", tile_event), ("communication", communication_event)
+        ]:
+            trace_event = sorted((start, end) for c, start, end in event_list if c == category)
+            assert len(trace_event) == len(target_event)
+            for (start, end), (target_start, target_end) in zip(trace_event, target_event):
+                assert abs(start - target_start) < 1e-6 and abs(end - target_end) < 1e-6
+        # wire events, busy time is the same
+        wire_busy_time = sum(end - start for c, start, end in event_list if c == "wire")
+        assert abs(wire_busy_time - array.wire_net.wire_busy_time.sum()) < 1e-6
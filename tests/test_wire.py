@@ -9,11 +9,126 @@
 @CreateTime:
     2022/05/07 17:33
 """
-from mnsim_noc.Wire import WireNet
+from mnsim_noc.Wire import BaseWire, WireNet
 
 def test_wire():
     """
     test wire net class
     """
     wire_net = WireNet((2, 2), 1)
-    wire_net.set_transparent_flag(True)
\ No newline at end of file
+    wire_net.set_transparent_flag(True)
+
+
+def test_wire_state():
+    """
+    test wire state and running rate with the wire index
+    """
+    wire_net = WireNet((2, 3), 2)
+    transfer_path = [((0, 0), (0, 1)), ((1, 1), (0, 1))]
+    path_index = wire_net.get_path_index(transfer_path)
+    assert path_index.tolist() == [0, 5]
+    assert wire_net.wires[5].wire_position == ((0, 1), (1, 1))
+    assert not wire_net.get_data_path_state(path_index)
+    wire_net.set_data_path_state(path_index, True, "0->1", 1.)
+    assert wire_net.get_data_path_state(transfer_path[1:])
+    assert wire_net.get_wire_transfer_time(path_index, [[0, 0, 0, 3, 9, 3, 0, 0, -1, 0]]) == 27
+    wire_net.set_data_path_state(path_index, False, "0->1", 3.)
+    wire_net.check_finish()
+    horizontal_rate, vectical_rate = wire_net.get_running_rate(4.)
+    assert horizontal_rate.shape == (2, 2) and vectical_rate.shape == (1, 3)
+    assert horizontal_rate[0, 0] == 0.5 and vectical_rate[0, 1] == 0.5
+
+def test_route_table():
+    """
+    test the route table of the wire net
+    """
+    wire_net = WireNet((3, 3), 4)
+    wire_net.route_table.build([((0, 0), (2, 1))])
+    route = wire_net.get_route((0, 0), (2, 1))
+    assert route is wire_net.get_route((0, 0), (2, 1))
+    assert route.path == [((0, 0), (0, 1)), ((0, 1), (1, 1)), ((1, 1), (2, 1))]
+    assert route.get_transfer_time(8) == 6
+
+def test_route_list():
+    """
+    test the minimal route list, XY first and YX second
+    """
+    wire_net = WireNet((4, 4), 1)
+    route_list = wire_net.route_table.get_route_list((0, 0), (2, 2), 16)
+    assert len(route_list) == 6
+    assert route_list[0] is wire_net.get_route((0, 0), (2, 2))
+    assert route_list[1].path == \
+        [((0, 0), (1, 0)), ((1, 0), (2, 0)), ((2, 0), (2, 1)), ((2, 1), (2, 2))]
+    assert len(set(tuple(route.path) for route in route_list)) == 6
+    for route in route_list:
+        assert len(route.wire_index) == 4
+        assert route.path[0][0] == (0, 0) and route.path[-1][1] == (2, 2)
+    assert len(wire_net.route_table.get_route_list((0, 0), (2, 2), 2)) == 2
+    assert len(wire_net.route_table.get_route_list((3, 0), (0, 0), 16)) == 1
+
+def test_packet_mode():
+    """
+    test the packet mode, the packets are pipelined across the hops
+    """
+    wire_net = WireNet((1, 4), 1)
+    wire_net.set_packet_mode(packet_size=4, vc_num=2, queue_depth=0)
+    path_index = wire_net.get_route((0, 0), (0, 3)).wire_index
+    # 12 bits, 3 packets on 3 hops, instead of 36 in the circuit mode
+    assert wire_net.reserve_packet_path(path_index, 12, 0.) == 20
+    # the second transfer waits for the reserved packets on each wire
+    assert wire_net.reserve_packet_path(path_index, 12, 0.) == 32
+    assert wire_net.wire_free_time.tolist() == [24, 28, 32]
+    # virtual channel
+    wire_net.set_data_path_state(path_index, True, "0->3", 0.)
+    assert not wire_net.get_data_path_state(path_index)
+    wire_net.set_data_path_state(path_index, True, "0->3", 0.)
+    assert wire_net.get_data_path_state(path_index)
+    wire_net.set_data_path_state(path_index, False, "0->3", 20.)
+    wire_net.set_data_path_state(path_index, False, "0->3", 32.)
+    wire_net.check_finish()
+    # back pressure, the first wire is held by the busy last wire without the queue
+    wire_net = WireNet((1, 3), 1)
+    wire_net.set_packet_mode(packet_size=4, vc_num=2, queue_depth=0)
+    wire_net.wire_free_time[1] = 100.
+    path_index = wire_net.get_route((0, 0), (0, 2)).wire_index
+    assert wire_net.reserve_packet_path(path_index, 12, 0.) == 112
+    assert wire_net.wire_free_time.tolist() == [108, 112]
+
+def test_link_model():
+    """
+    test the link model and the band width of each wire
+    """
+    wire_net = WireNet((1, 4), 2)
+    route = wire_net.get_route((0, 0), (0, 3))
+    assert route.get_transfer_time(8) == 12
+    wire_net.wires[route.wire_index[1]].band_width = 1
+    assert wire_net.wires[route.wire_index[1]].band_width == 1
+    assert route.get_transfer_time(8) == 16
+    wire_net.set_link_model("pipelined", router_delay=1.)
+    assert route.get_transfer_time(8) == 3 + 8
+    wire_net.set_band_width(route.wire_index, [4, 4, 8])
+    assert route.get_transfer_time(8) == 3 + 2
+    assert wire_net.get_wire_transfer_time(route.wire_index, [[0, 0, 0, 1, 8, 1, 0, 0, -1, 0]]) == 5
+
+def test_tree_route():
+    """
+    test the tree route, the union of the XY routes
+    """
+    wire_net = WireNet((3, 3), 1)
+    tree_route = wire_net.get_tree_route((0, 0), [(2, 2), (1, 2), (0, 1)])
+    assert len(tree_route.wire_index) == 4
+    assert tree_route.get_transfer_time(8) == 32
+    assert tree_route is wire_net.get_tree_route((0, 0), [(2, 2), (1, 2), (0, 1)])
+
+def test_base_wire():
+    """
+    test the base wire, the view of one wire in the wire net
+    """
+    wire_net = WireNet((2, 3), 4)
+    wire = BaseWire(wire_net, wire_net.get_wire_index(((1, 2), (1, 1))))
+    assert wire.wire_position == ((1, 1), (1, 2)) and wire.band_width == 4
+    assert wire.get_transfer_time([[0, 0, 0, 3, 8, 3, 0, 0, -1, 0]]) == 6
+    wire.set_wire_state(True, "0->1", 1.)
+    assert wire.get_wire_state()
+    wire.set_wire_state(False, "0->1", 3.)
+    assert wire.get_running_rate(4.) == 0.5
@@ -0,0 +1,78 @@
+#-*-coding:utf-8-*-
+"""
+@FileName:
+    test_workload.py
+@Description:
+    test the compiled workload
+@CreateTime:
+    2026/10/17 02:30
+"""
+import pickle
+import numpy as np
+from mnsim_noc.Array import BaseArray
+from mnsim_noc.Buffer import DataBlock
+from mnsim_noc.utils.workload import compile_task_behavior, load_task_behavior, \
+    load_compiled_task
+
+def test_compiled_workload(get_test_config, tmp_path):
+    """
+    test the compiled workload, the same behavior and simulation result
+    """
+    task_behavior = get_test_config()[0]
+    path = str(tmp_path / "test.npz")
+    compile_task_behavior(task_behavior, path)
+    compiled_task = load_task_behavior(path)
+    assert len(compiled_task) == len(task_behavior)
+    for tile_behavior, view in zip(task_behavior, compiled_task):
+        for key in ["task_id", "layer_id", "tile_id", "target_tile_id", "source_tile_id"]:
+            assert view[key] == tile_behavior[key]
+        assert len(view["dependence"]) == len(tile_behavior["dependence"])
+        for dependence, dependence_view in zip(tile_behavior["dependence"], view["dependence"]):
+            assert dict(dependence_view) == dependence
+            # decoded once, the data blocks are shared by the reads
+            for key in ["wait", "output", "drop"]:
+                assert dependence_view[key] is dependence_view[key]
+                assert all(isinstance(data, DataBlock) for data in dependence_view[key])
+    # the same simulation result
+    result_list = []
+    for task in [task_behavior, compiled_task]:
+        array = BaseArray([task], 2, (3, 3), (4096, 4096), 1)
+        array.run()
+        result_list.append((
+            array.time_point_list,
+            [tile.computation_range_time for tile in array.tile_list],
+            array.get_latency_throughput()
+        ))
+    assert result_list[0] == result_list[1]
+
+def test_mmap_workload(get_test_config, tmp_path):
+    """
+    test the memory-mapped workload, shared by the path in the sweep workers
+    """
+    path = str(tmp_path / "test.npz")
+    compile_task_behavior(get_test_config()[0], path)
+    mmap_task = load_compiled_task(path)
+    read_task = load_compiled_task(path, mmap=False)
+    assert sorted(mmap_task.array_dict.keys()) == sorted(read_task.array_dict.keys())
+    for key, value in read_task.array_dict.items():
+        assert isinstance(mmap_task.array_dict[key].base, np.memmap) or value.size == 0
+        assert not mmap_task.array_dict[key].flags.writeable
+        assert np.array_equal(mmap_task.array_dict[key], value)
+    # the reads are decoded once from the memory map and cached in this process
+    for tile_behavior in mmap_task:
+        for dependence in tile_behavior["dependence"]:
+            assert dependence is mmap_task.get_dependence(dependence.index)
+            assert dependence["wait"] is dependence["wait"]
+    assert len(mmap_task.data_list_cache) > 0
+    # pickled by the path, not the data or the cache
+    data = pickle.dumps(mmap_task)
+    assert len(data) < 1024
+    assert np.array_equal(pickle.loads(data).array_dict["wait"], read_task.array_dict["wait"])
+    assert len(pickle.loads(data).data_list_cache) == 0
+    # sweep on the process pool
+    from mnsim_noc.sweep import run_sweep
+    table = run_sweep({
+        "base": {"image_num": 2, "task_config_path_list": [path]},
+        "grid": {"band_width": [1, 2]},
+    }, 2)
+    assert all(row["error"] == "" for row in table)